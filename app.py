@@ -8,30 +8,87 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Static HTML, built once at import and injected with st.html (no Markdown parsing)
+_CSS = """
+<style>
+.big-font {
+    font-size:60px !important;
+    font-weight: bold;
+    text-align: center;
+}
+.medium-font {
+    font-size:30px !important;
+    text-align: center;
+}
+.card {
+    padding: 20px;
+    border-radius: 10px;
+    background-color: #f0f2f6;
+    margin: 10px 0;
+}
+</style>
+"""
+
+_TITLE = '<p class="big-font">📊 DCF Analysis Suite</p>'
+_SUBTITLE = '<p class="medium-font">Complete Financial Valuation Toolkit</p>'
+
+_CARD1 = """
+<div class="card">
+<h3>📈 Phase 1: WACC Calculator</h3>
+<p><strong>Status:</strong> ✅ Complete</p>
+<p>Calculate the Weighted Average Cost of Capital for any publicly traded company.</p>
+<br>
+<p><strong>Features:</strong></p>
+<ul>
+    <li>Capital structure analysis</li>
+    <li>Beta calculation via OLS regression</li>
+    <li>Cost of equity (CAPM)</li>
+    <li>Cost of debt with credit spreads</li>
+    <li>WACC with confidence intervals</li>
+</ul>
+</div>
+"""
+
+_CARD2 = """
+<div class="card">
+<h3>📊 Phase 2: Historical Analysis</h3>
+<p><strong>Status:</strong> ✅ Complete</p>
+<p>Analyze historical financial performance and key valuation metrics.</p>
+<br>
+<p><strong>Features:</strong></p>
+<ul>
+    <li>Revenue and EBIT growth rates</li>
+    <li>Profit margins analysis</li>
+    <li>Working capital metrics</li>
+    <li>Reinvestment calculations</li>
+    <li>Historical trend visualizations</li>
+</ul>
+</div>
+"""
+
+_CARD3 = """
+<div class="card">
+<h3>💰 Phase 3: DCF Model</h3>
+<p><strong>Status:</strong> ✅ Complete</p>
+<p>Complete DCF valuation with projected cash flows and terminal value.</p>
+<br>
+<p><strong>Features:</strong></p>
+<ul>
+    <li>Cash flow projections</li>
+    <li>Terminal value calculation</li>
+    <li>Enterprise value estimation</li>
+    <li>Share price valuation</li>
+    <li>Sensitivity analysis</li>
+</ul>
+</div>
+"""
+
 # Custom CSS
-st.markdown("""
-    <style>
-    .big-font {
-        font-size:60px !important;
-        font-weight: bold;
-        text-align: center;
-    }
-    .medium-font {
-        font-size:30px !important;
-        text-align: center;
-    }
-    .card {
-        padding: 20px;
-        border-radius: 10px;
-        background-color: #f0f2f6;
-        margin: 10px 0;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+st.html(_CSS)
 
 # Title
-st.markdown('<p class="big-font">📊 DCF Analysis Suite</p>', unsafe_allow_html=True)
-st.markdown('<p class="medium-font">Complete Financial Valuation Toolkit</p>', unsafe_allow_html=True)
+st.html(_TITLE)
+st.html(_SUBTITLE)
 
 st.divider()
 
@@ -50,58 +107,13 @@ st.divider()
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    st.markdown("""
-    <div class="card">
-    <h3>📈 Phase 1: WACC Calculator</h3>
-    <p><strong>Status:</strong> ✅ Complete</p>
-    <p>Calculate the Weighted Average Cost of Capital for any publicly traded company.</p>
-    <br>
-    <p><strong>Features:</strong></p>
-    <ul>
-        <li>Capital structure analysis</li>
-        <li>Beta calculation via OLS regression</li>
-        <li>Cost of equity (CAPM)</li>
-        <li>Cost of debt with credit spreads</li>
-        <li>WACC with confidence intervals</li>
-    </ul>
-    </div>
-    """, unsafe_allow_html=True)
+    st.html(_CARD1)
 
 with col2:
-    st.markdown("""
-    <div class="card">
-    <h3>📊 Phase 2: Historical Analysis</h3>
-    <p><strong>Status:</strong> ✅ Complete</p>
-    <p>Analyze historical financial performance and key valuation metrics.</p>
-    <br>
-    <p><strong>Features:</strong></p>
-    <ul>
-        <li>Revenue and EBIT growth rates</li>
-        <li>Profit margins analysis</li>
-        <li>Working capital metrics</li>
-        <li>Reinvestment calculations</li>
-        <li>Historical trend visualizations</li>
-    </ul>
-    </div>
-    """, unsafe_allow_html=True)
+    st.html(_CARD2)
 
 with col3:
-    st.markdown("""
-    <div class="card">
-    <h3>💰 Phase 3: DCF Model</h3>
-    <p><strong>Status:</strong> ✅ Complete</p>
-    <p>Complete DCF valuation with projected cash flows and terminal value.</p>
-    <br>
-    <p><strong>Features:</strong></p>
-    <ul>
-        <li>Cash flow projections</li>
-        <li>Terminal value calculation</li>
-        <li>Enterprise value estimation</li>
-        <li>Share price valuation</li>
-        <li>Sensitivity analysis</li>
-    </ul>
-    </div>
-    """, unsafe_allow_html=True)
+    st.html(_CARD3)
 
 st.divider()
 
@@ -129,7 +141,7 @@ institutional-grade analysis accessible through a user-friendly interface.
 - **Framework**: Streamlit
 - **Data Analysis**: pandas, numpy
 - **Statistical Analysis**: statsmodels
-- **Visualizations**: matplotlib, seaborn
+- **Visualizations**: matplotlib, Altair
 
 ## 📬 Navigation
 
@@ -0,0 +1,30 @@
+"""
+yfinance lookups shared by the pages.
+
+st.cache_data keys its cache on the decorated function, so a fetcher defined
+in one page script is not reused by another. Fetchers that more than one page
+needs live here so that moving between pages for the same ticker hits the
+same cache entry.
+"""
+
+import streamlit as st
+
+@st.cache_data(ttl=900, max_entries=64, show_spinner=False)
+def fetch_info(ticker_symbol):
+    """
+    Fetch the yfinance info dict for a ticker, cached for 15 minutes.
+
+    Raises instead of returning an incomplete dict, since st.cache_data does
+    not cache exceptions and a failed lookup is retried on the next run.
+
+    Returns:
+        dict: yfinance info dict with at least marketCap and sharesOutstanding
+    """
+    import yfinance as yf
+
+    # A fresh Ticker per cache miss: yfinance memoizes .info on the instance
+    info = yf.Ticker(ticker_symbol).info
+    if not info.get('marketCap') or not info.get('sharesOutstanding'):
+        raise ValueError(f"No market data found for {ticker_symbol}. "
+                         "Please check the ticker symbol and try again.")
+    return info
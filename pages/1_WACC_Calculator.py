@@ -1,10 +1,10 @@
+import re
+
 import streamlit as st
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import statsmodels.api as sm
-import yfinance as yf
+
+from market_data import fetch_info
 
 # Page configuration
 st.set_page_config(
@@ -32,50 +32,177 @@ credit_spreads = [
     {"GreaterThan": 8.5, "LessThan": 100000, "Rating": "Aaa/AAA", "Spread": 0.45}
 ]
 
-def get_credit_spread(rating, credit_spreads):
+# Ticker/index symbols: letters, digits, '.', '-', '=' with an optional leading '^'
+_SYMBOL_RE = re.compile(r"\^?[A-Z0-9][A-Z0-9.\-=]{0,9}")
+
+# Pre-built lookup and display table so reruns don't rebuild them
+_SPREAD_LOOKUP = {e["Rating"].strip().lower(): e["Spread"] / 100 for e in credit_spreads}
+_SPREADS_DISPLAY = pd.DataFrame([{"Rating": e["Rating"], "Spread": f"{e['Spread']:.2f}%"}
+                                 for e in credit_spreads])
+
+def get_credit_spread(rating):
     """
     Looks up the credit spread for a given credit rating.
 
     Args:
         rating (str): The credit rating of the firm.
-        credit_spreads (list): A list of dictionaries containing credit spread data.
 
     Returns:
         float: The credit spread as a decimal, or NaN if no match is found.
     """
-    for entry in credit_spreads:
-        if entry["Rating"].strip().lower() == rating.strip().lower():
-            return float(entry["Spread"]) / 100
-    st.warning(f"Warning: No spread found for rating {rating}")
-    return np.nan
+    spread = _SPREAD_LOOKUP.get(rating.strip().lower())
+    if spread is None:
+        st.warning(f"Warning: No spread found for rating {rating}")
+        return np.nan
+    return spread
+
+def _company_fields(ticker_symbol):
+    """
+    Pick the fields used from the shared, cached yfinance info dict.
+
+    Returns:
+        tuple: (market_cap, total_debt, long_name)
+    """
+    info = fetch_info(ticker_symbol)
+    return info['marketCap'], info.get('totalDebt') or 0, info.get('longName', ticker_symbol)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_prices(ticker_symbol, index_symbol):
+    """
+    Download 5 years of monthly adjusted closes for the stock and the index, cached for an hour.
+
+    yf.download logs failed symbols instead of raising, so empty series are
+    raised here to keep them out of the cache.
+
+    Returns:
+        tuple: (stock_data, index_data) as pandas Series
+    """
+    import yfinance as yf
+
+    # One batched request for both symbols; adjusted closes only, no dividend/split columns
+    hist = yf.download([ticker_symbol, index_symbol], period='5y', interval='1mo',
+                       group_by='ticker', progress=False, threads=True,
+                       auto_adjust=True, actions=False)
+    stock_data = hist[ticker_symbol]['Close'].dropna()
+    index_data = hist[index_symbol]['Close'].dropna()
+    if stock_data.empty or index_data.empty:
+        raise ValueError("no price history returned")
+    return stock_data, index_data
 
 def get_stock_data(ticker_symbol, index_symbol):
     """
     Fetch stock and index data from yfinance.
 
+    Stops the script with an error message if a symbol is malformed or a lookup fails.
+
     Args:
         ticker_symbol (str): Stock ticker symbol
         index_symbol (str): Market index ticker symbol
 
     Returns:
-        tuple: (ticker object, stock_data, index_data, info)
+        tuple: (stock_data, index_data, info) where info is
+        (market_cap, total_debt, long_name)
     """
-    try:
-        ticker = yf.Ticker(ticker_symbol)
-        info = ticker.info
+    for symbol in (ticker_symbol, index_symbol):
+        if not _SYMBOL_RE.fullmatch(symbol.upper()):
+            st.error(f"Invalid symbol '{symbol}'. Please check the ticker symbol and try again.")
+            st.stop()
 
-        # Download historical data for beta calculation
-        stock_data = yf.download(ticker_symbol, period='5y', interval='1mo', progress=False)['Close']
-        index_data = yf.download(index_symbol, period='5y', interval='1mo', progress=False)['Close']
+    try:
+        info = _company_fields(ticker_symbol)
+    except Exception as e:
+        st.error(f"Info lookup failed for {ticker_symbol}: {e}")
+        st.stop()
 
-        return ticker, stock_data, index_data, info
+    # Download historical data for beta calculation
+    try:
+        stock_data, index_data = _fetch_prices(ticker_symbol, index_symbol)
     except Exception as e:
-        st.error(f"Error fetching data: {str(e)}")
-        return None, None, None, None
+        st.error(f"Price history download failed for {ticker_symbol}/{index_symbol}: {e}")
+        st.stop()
+
+    return stock_data, index_data, info
+
+def _ols_numpy(y, x):
+    """
+    Closed-form OLS of y on [1, x] with NumPy: beta = cov(x, y) / var(x).
+
+    Returns:
+        tuple: (alpha, beta, se_beta, rsquared)
+    """
+    n = len(x)
+
+    xm = x.mean()
+    ym = y.mean()
+    dx = x - xm
+    dy = y - ym
+    sxx = dx @ dx
+    beta = (dx @ dy) / sxx
+    alpha = ym - beta * xm
+
+    # Slope standard error from the residual variance
+    resid = y - alpha - beta * x
+    ssr = resid @ resid
+    se_beta = np.sqrt(ssr / (n - 2) / sxx)
+
+    return alpha, beta, se_beta, 1 - ssr / (dy @ dy)
+
+def _beta_and_se(y, x):
+    """
+    Single-pass OLS of y on [1, x], written as a loop for numba.
+
+    Accumulates all sums in float64 in one pass instead of allocating the
+    centered temporaries, which matters for batched beta sweeps.
+
+    Returns:
+        tuple: (alpha, beta, se_beta, rsquared)
+    """
+    n = x.shape[0]
+    sx = 0.0
+    sy = 0.0
+    sxx = 0.0
+    sxy = 0.0
+    syy = 0.0
+    for k in range(n):
+        xk = x[k]
+        yk = y[k]
+        sx += xk
+        sy += yk
+        sxx += xk * xk
+        sxy += xk * yk
+        syy += yk * yk
+
+    # Centered sums of squares and cross-products
+    xm = sx / n
+    ym = sy / n
+    cxx = sxx - sx * xm
+    cxy = sxy - sx * ym
+    cyy = syy - sy * ym
+
+    beta = cxy / cxx
+    alpha = ym - beta * xm
+    ssr = cyy - beta * cxy
+    se_beta = np.sqrt(ssr / (n - 2) / cxx)
+
+    return alpha, beta, se_beta, 1.0 - ssr / cyy
+
+@st.cache_resource(show_spinner=False)
+def _beta_kernel():
+    """
+    numba-compiled _beta_and_se when numba is installed, else the NumPy closed form.
+
+    Compiled with NumPy's error model (and without fastmath) so degenerate
+    inputs give inf/NaN like _ols_numpy instead of raising ZeroDivisionError.
+    """
+    try:
+        import numba
+    except ImportError:
+        return _ols_numpy
+    return numba.njit(cache=True, error_model='numpy')(_beta_and_se)
 
 def calculate_beta(stock_data, index_data, rf):
     """
-    Calculate beta using OLS regression.
+    Calculate beta using a closed-form single-factor OLS regression.
 
     Args:
         stock_data: Stock price data
@@ -83,21 +210,128 @@ def calculate_beta(stock_data, index_data, rf):
         rf (float): Risk-free rate
 
     Returns:
-        tuple: (beta, results, stock_returns, index_returns)
+        tuple: (beta, regression, stock_returns, index_returns) where regression is a
+        dict with alpha, se_beta, conf_int (95%) and rsquared, and the returns are
+        NumPy arrays of monthly excess returns
     """
-    # Calculate monthly returns
-    stock_returns = stock_data.pct_change().dropna() - rf
-    index_returns = index_data.pct_change().dropna() - rf
-
-    # Run OLS regression
-    X = sm.add_constant(index_returns)
-    model = sm.OLS(stock_returns, X)
-    results = model.fit()
-
-    # Get beta (coefficient on index returns)
-    beta = results.params.iloc[1]
-
-    return beta, results, stock_returns, index_returns
+    from scipy import stats
+
+    # Inner-join both price series on their common months -> (n, 2) array
+    prices = pd.concat([stock_data, index_data], axis=1, join='inner').dropna()
+    # float32 halves the memory traffic of the return arrays; for ~60 monthly
+    # observations beta and its SE stay accurate well beyond the 4 decimals shown
+    p = prices.to_numpy(dtype=np.float32)
+
+    # Calculate monthly excess returns, dropping any non-finite months in one pass
+    rets = p[1:] / p[:-1] - 1.0 - rf
+    rets = rets[np.isfinite(rets).all(axis=1)]
+    stock_returns = rets[:, 0]
+    index_returns = rets[:, 1]
+
+    # OLS of excess stock returns on [1, excess index returns]
+    n = len(index_returns)
+    if n < 3:
+        # Slope standard error needs n - 2 > 0 degrees of freedom
+        raise ValueError(f"Need at least 3 overlapping monthly returns to estimate beta, got {n}")
+    alpha, beta, se_beta, rsquared = _beta_kernel()(stock_returns, index_returns)
+
+    # Scalars go back to float64 so downstream WACC math is not done in float32
+    beta, alpha, se_beta = float(beta), float(alpha), float(se_beta)
+    half_width = stats.t.ppf(0.975, n - 2) * se_beta
+
+    regression = {
+        'alpha': alpha,
+        'se_beta': se_beta,
+        'conf_int': (beta - half_width, beta + half_width),
+        'rsquared': float(rsquared)
+    }
+
+    return beta, regression, stock_returns, index_returns
+
+@st.cache_data(show_spinner=False)
+def regression_summary(stock_returns, index_returns):
+    """Full statsmodels OLS summary text, only used by the results expander."""
+    import statsmodels.api as sm
+
+    results = sm.OLS(stock_returns, sm.add_constant(index_returns)).fit()
+    return results.summary().as_text()
+
+def _pie_chart(w_E, w_D):
+    """Capital structure pie chart, rendered client-side by Vega-Lite."""
+    import altair as alt
+
+    weights = pd.DataFrame({'Component': ['Equity', 'Debt'], 'Weight': [w_E, w_D]})
+    return alt.Chart(weights, title='Capital Structure').mark_arc().encode(
+        theta='Weight:Q',
+        color=alt.Color('Component:N', sort=['Equity', 'Debt'],
+                        scale=alt.Scale(domain=['Equity', 'Debt'], range=['#2E86AB', '#A23B72'])),
+        tooltip=['Component', alt.Tooltip('Weight:Q', format='.1%')]
+    )
+
+@st.cache_data(show_spinner=False)
+def _scatter_fig(x_arr, y_arr, alpha, beta, ticker_symbol, index_name):
+    """Excess-return scatter with the fitted regression line, cached on the inputs."""
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 6))
+    ax.scatter(x_arr, y_arr, alpha=0.5, s=15, rasterized=True)
+
+    # Add regression line
+    x_line = np.array([float(x_arr.min()), float(x_arr.max())])
+    y_line = alpha + beta * x_line
+    ax.plot(x_line, y_line, 'r-', linewidth=2, label=f'Beta = {beta:.2f}')
+
+    ax.set_xlabel(f'{index_name} Excess Returns')
+    ax.set_ylabel(f'{ticker_symbol} Excess Returns')
+    ax.set_title(f'{ticker_symbol} vs {index_name}')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    plt.close(fig)
+    return fig
+
+def _wacc_bar_chart(wacc_lower_ci, wacc, wacc_upper_ci, ticker_symbol):
+    """Bar chart of the three WACC estimates, rendered client-side by Vega-Lite."""
+    import altair as alt
+
+    labels = ['Lower CI', 'Estimate', 'Upper CI']
+    estimates = pd.DataFrame({'Estimate': labels,
+                              'WACC (%)': [wacc_lower_ci * 100, wacc * 100, wacc_upper_ci * 100]})
+    base = alt.Chart(estimates, title=f'WACC Estimates for {ticker_symbol}').encode(
+        x=alt.X('Estimate:N', sort=labels, title=None),
+        y='WACC (%):Q'
+    )
+    bars = base.mark_bar().encode(
+        color=alt.Color('Estimate:N', sort=labels, legend=None,
+                        scale=alt.Scale(domain=labels, range=['#FF6B6B', '#4ECDC4', '#FF6B6B']))
+    )
+    # Value labels on bars
+    text = base.mark_text(dy=-8).encode(text=alt.Text('WACC (%):Q', format='.2f'))
+    return bars + text
+
+# Static instructions shown before the first calculation
+_INSTRUCTIONS_MD = """
+### How to Use This Calculator
+
+1. **Enter Ticker Symbol**: Input the stock ticker (e.g., MSFT, AAPL, GOOGL)
+2. **Set Risk-Free Rate**: Enter the current risk-free rate (typically 10-year Treasury yield)
+3. **Credit Rating**: Enter the firm's credit rating (e.g., Aaa/AAA, A2/A)
+4. **Set Parameters**: Adjust EMRP, tax rate, and market index as needed
+5. **Calculate**: Click the "Calculate WACC" button to see results
+
+### What is WACC?
+
+The Weighted Average Cost of Capital (WACC) represents the average rate a company must pay to finance its assets.
+It's calculated using the formula:
+"""
+
+_WACC_TERMS_MD = """
+Where:
+- **wE** = Weight of equity in capital structure
+- **kE** = Cost of equity (calculated using CAPM)
+- **wD** = Weight of debt in capital structure
+- **kD** = Cost of debt (risk-free rate + credit spread)
+- **t** = Marginal tax rate
+"""
 
 # Title
 st.title("📈 WACC Calculator")
@@ -106,141 +340,135 @@ st.markdown("Calculate the Weighted Average Cost of Capital for any publicly tra
 # Sidebar for inputs
 st.sidebar.header("Input Parameters")
 
-ticker_symbol = st.sidebar.text_input("Ticker Symbol", value="MSFT").upper()
-rf = st.sidebar.number_input("Risk-Free Rate (%)", min_value=0.0, max_value=20.0, value=4.5, step=0.1) / 100
-firm_rating = st.sidebar.text_input("Firm Credit Rating", value="Aaa/AAA")
-emrp = st.sidebar.number_input("Equity Market Risk Premium (%)", min_value=0.0, max_value=20.0, value=5.0, step=0.1) / 100
-marg_tax_rate = st.sidebar.number_input("Marginal Tax Rate (%)", min_value=0.0, max_value=100.0, value=25.0, step=1.0) / 100
-index_symbol = st.sidebar.text_input("Market Index Symbol", value="^GSPC")
-index_name = st.sidebar.text_input("Market Index Name", value="S&P 500")
-
-scale_option = st.sidebar.selectbox("Display Scale", ["Millions", "Billions"])
-scale_factor = 1000000 if scale_option == "Millions" else 1000000000
-scale_name = "M" if scale_option == "Millions" else "B"
-
-calculate_button = st.sidebar.button("Calculate WACC", type="primary")
-
+# Inputs only trigger a rerun when the form is submitted
+with st.sidebar.form("wacc_inputs"):
+    ticker_symbol = st.text_input("Ticker Symbol", value="MSFT").upper()
+    rf = st.number_input("Risk-Free Rate (%)", min_value=0.0, max_value=20.0, value=4.5, step=0.1) / 100
+    firm_rating = st.text_input("Firm Credit Rating", value="Aaa/AAA")
+    emrp = st.number_input("Equity Market Risk Premium (%)", min_value=0.0, max_value=20.0, value=5.0, step=0.1) / 100
+    marg_tax_rate = st.number_input("Marginal Tax Rate (%)", min_value=0.0, max_value=100.0, value=25.0, step=1.0) / 100
+    index_symbol = st.text_input("Market Index Symbol", value="^GSPC").upper()
+    index_name = st.text_input("Market Index Name", value="S&P 500")
+
+    scale_option = st.selectbox("Display Scale", ["Millions", "Billions"])
+    scale_factor = 1000000 if scale_option == "Millions" else 1000000000
+    scale_name = "M" if scale_option == "Millions" else "B"
+
+    calculate_button = st.form_submit_button("Calculate WACC", type="primary")
+
+# Keep the submitted inputs so that result-area widgets (e.g. the breakdown
+# toggle) can rerun the script; form widgets reset when the page is left,
+# so later runs render from these rather than the widgets. Fetches are cached.
 if calculate_button:
-    with st.spinner(f"Fetching data for {ticker_symbol}..."):
-        ticker, stock_data, index_data, info = get_stock_data(ticker_symbol, index_symbol)
+    st.session_state.wacc_submitted_inputs = (ticker_symbol, rf, firm_rating, emrp,
+                                               marg_tax_rate, index_symbol, index_name)
 
-    if ticker is not None and info is not None:
-        try:
-            # Section 1: Debt and Equity Weights
-            st.header("1️⃣ Debt and Equity Weights")
+if 'wacc_submitted_inputs' in st.session_state:
+    (ticker_symbol, rf, firm_rating, emrp,
+     marg_tax_rate, index_symbol, index_name) = st.session_state.wacc_submitted_inputs
 
-            col1, col2 = st.columns(2)
+    with st.spinner(f"Fetching data for {ticker_symbol}..."):
+        stock_data, index_data, info = get_stock_data(ticker_symbol, index_symbol)
 
-            market_cap = info.get('marketCap', 0) / scale_factor
-            total_debt = info.get('totalDebt', 0) / scale_factor
-            company_name = info.get('longName', ticker_symbol)
+    try:
+        # Section 1: Debt and Equity Weights
+        st.header("1️⃣ Debt and Equity Weights")
 
-            with col1:
-                st.metric("Company", company_name)
-                st.metric(f"Market Capitalization (${scale_name})", f"{market_cap:,.2f}")
-                st.metric(f"Total Debt (${scale_name})", f"{total_debt:,.2f}")
+        col1, col2 = st.columns(2)
 
-            # Calculate weights
-            w_E = market_cap / (market_cap + total_debt)
-            w_D = total_debt / (market_cap + total_debt)
+        market_cap, total_debt, company_name = info
+        total_capital = market_cap + total_debt
+        if total_capital <= 0:
+            st.error("Market cap and total debt are both zero; cannot compute capital weights.")
+            st.stop()
 
-            with col2:
-                st.metric("Equity Weight (wE)", f"{w_E:.2%}")
-                st.metric("Debt Weight (wD)", f"{w_D:.2%}")
+        with col1:
+            st.metric("Company", company_name)
+            st.metric(f"Market Capitalization (${scale_name})", f"{market_cap / scale_factor:,.2f}")
+            st.metric(f"Total Debt (${scale_name})", f"{total_debt / scale_factor:,.2f}")
 
-                # Pie chart
-                fig, ax = plt.subplots(figsize=(6, 4))
-                ax.pie([w_E, w_D], labels=['Equity', 'Debt'], autopct='%1.1f%%',
-                       colors=['#2E86AB', '#A23B72'], startangle=90)
-                ax.set_title('Capital Structure')
-                st.pyplot(fig)
+        # Calculate weights on unscaled values; scaling is for display only
+        w_E = market_cap / total_capital
+        w_D = total_debt / total_capital
 
-            st.divider()
+        with col2:
+            st.metric("Equity Weight (wE)", f"{w_E:.2%}")
+            st.metric("Debt Weight (wD)", f"{w_D:.2%}")
 
-            # Section 2: Cost of Equity
-            st.header("2️⃣ Cost of Equity")
+            # Pie chart
+            st.altair_chart(_pie_chart(w_E, w_D), use_container_width=True)
 
-            with st.spinner("Calculating beta..."):
-                beta, results, stock_returns, index_returns = calculate_beta(stock_data, index_data, rf)
+        st.divider()
 
-            col1, col2 = st.columns(2)
+        # Section 2: Cost of Equity
+        st.header("2️⃣ Cost of Equity")
 
-            with col1:
-                st.subheader("Beta Calculation")
-                st.metric("Beta", f"{beta:.4f}")
+        with st.spinner("Calculating beta..."):
+            beta, regression, stock_returns, index_returns = calculate_beta(stock_data, index_data, rf)
 
-                # Get confidence interval for beta
-                beta_ci = results.conf_int(alpha=0.05)
-                beta_lower_ci = beta_ci.iloc[1, 0]
-                beta_upper_ci = beta_ci.iloc[1, 1]
+        col1, col2 = st.columns(2)
 
-                st.write(f"**95% Confidence Interval:** [{beta_lower_ci:.4f}, {beta_upper_ci:.4f}]")
-                st.write(f"**R-squared:** {results.rsquared:.4f}")
+        with col1:
+            st.subheader("Beta Calculation")
+            st.metric("Beta", f"{beta:.4f}")
 
-                # Calculate cost of equity
-                cost_of_equity = rf + beta * emrp
-                st.metric("Cost of Equity", f"{cost_of_equity:.2%}")
+            # Get confidence interval for beta
+            beta_lower_ci, beta_upper_ci = regression['conf_int']
 
-            with col2:
-                st.subheader("Regression Analysis")
-                # Scatter plot with regression line
-                fig, ax = plt.subplots(figsize=(8, 6))
-                ax.scatter(index_returns, stock_returns, alpha=0.5)
+            st.write(f"**95% Confidence Interval:** [{beta_lower_ci:.4f}, {beta_upper_ci:.4f}]")
+            st.write(f"**R-squared:** {regression['rsquared']:.4f}")
 
-                # Add regression line
-                x_line = np.linspace(index_returns.min(), index_returns.max(), 100)
-                y_line = results.params[0] + results.params[1] * x_line
-                ax.plot(x_line, y_line, 'r-', linewidth=2, label=f'Beta = {beta:.2f}')
+            # Calculate cost of equity
+            cost_of_equity = rf + beta * emrp
+            st.metric("Cost of Equity", f"{cost_of_equity:.2%}")
 
-                ax.set_xlabel(f'{index_name} Excess Returns')
-                ax.set_ylabel(f'{ticker_symbol} Excess Returns')
-                ax.set_title(f'{ticker_symbol} vs {index_name}')
-                ax.legend()
-                ax.grid(True, alpha=0.3)
-                st.pyplot(fig)
+        with col2:
+            st.subheader("Regression Analysis")
+            # Scatter plot with regression line
+            st.pyplot(_scatter_fig(index_returns, stock_returns,
+                                   regression['alpha'], beta, ticker_symbol, index_name))
 
-            # Display regression summary in expander
-            with st.expander("View Full Regression Results"):
-                st.text(results.summary())
+        # Display regression summary in expander
+        with st.expander("View Full Regression Results"):
+            st.text(regression_summary(stock_returns, index_returns))
 
-            st.divider()
+        st.divider()
 
-            # Section 3: Cost of Debt
-            st.header("3️⃣ Cost of Debt")
+        # Section 3: Cost of Debt
+        st.header("3️⃣ Cost of Debt")
 
-            col1, col2 = st.columns(2)
+        col1, col2 = st.columns(2)
 
-            with col1:
-                credit_spread = get_credit_spread(firm_rating, credit_spreads)
-                st.metric("Credit Rating", firm_rating)
-                st.metric("Credit Spread", f"{credit_spread:.2%}")
+        with col1:
+            credit_spread = get_credit_spread(firm_rating)
+            st.metric("Credit Rating", firm_rating)
+            st.metric("Credit Spread", f"{credit_spread:.2%}")
 
-                cost_of_debt = rf + credit_spread
-                st.metric("Cost of Debt (kD)", f"{cost_of_debt:.2%}")
+            cost_of_debt = rf + credit_spread
+            st.metric("Cost of Debt (kD)", f"{cost_of_debt:.2%}")
 
-            with col2:
-                st.subheader("Credit Spread Reference")
-                # Display credit spreads table
-                spreads_df = pd.DataFrame(credit_spreads)
-                spreads_df['Spread'] = spreads_df['Spread'].apply(lambda x: f"{x:.2f}%")
-                st.dataframe(spreads_df[['Rating', 'Spread']], hide_index=True)
+        with col2:
+            st.subheader("Credit Spread Reference")
+            # Display credit spreads table
+            st.dataframe(_SPREADS_DISPLAY, hide_index=True)
 
-            st.divider()
+        st.divider()
 
-            # Section 4: WACC Results
-            st.header("4️⃣ WACC Results")
+        # Section 4: WACC Results
+        st.header("4️⃣ WACC Results")
 
-            # Calculate WACC
-            wacc = w_E * cost_of_equity + w_D * cost_of_debt * (1 - marg_tax_rate)
+        # Calculate WACC
+        wacc = w_E * cost_of_equity + w_D * cost_of_debt * (1 - marg_tax_rate)
 
-            # Calculate WACC with confidence intervals
-            cost_of_equity_lower_ci = rf + beta_lower_ci * emrp
-            cost_of_equity_upper_ci = rf + beta_upper_ci * emrp
+        # Calculate WACC with confidence intervals
+        cost_of_equity_lower_ci = rf + beta_lower_ci * emrp
+        cost_of_equity_upper_ci = rf + beta_upper_ci * emrp
 
-            wacc_lower_ci = w_E * cost_of_equity_lower_ci + w_D * cost_of_debt * (1 - marg_tax_rate)
-            wacc_upper_ci = w_E * cost_of_equity_upper_ci + w_D * cost_of_debt * (1 - marg_tax_rate)
+        wacc_lower_ci = w_E * cost_of_equity_lower_ci + w_D * cost_of_debt * (1 - marg_tax_rate)
+        wacc_upper_ci = w_E * cost_of_equity_upper_ci + w_D * cost_of_debt * (1 - marg_tax_rate)
 
-            # Save WACC results to session state for Phase 3 DCF Model
+        # Save WACC results to session state for Phase 3 DCF Model
+        if calculate_button:
             st.session_state.wacc_results = {
                 'wacc_lower': wacc_lower_ci,
                 'wacc': wacc,
@@ -249,99 +477,62 @@ if calculate_button:
                 'timestamp': pd.Timestamp.now()
             }
 
-            # Display main WACC
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("WACC (Lower CI)", f"{wacc_lower_ci:.2%}")
-            with col2:
-                st.metric("WACC (Estimate)", f"{wacc:.2%}", help="Primary WACC estimate")
-            with col3:
-                st.metric("WACC (Upper CI)", f"{wacc_upper_ci:.2%}")
-
-            # WACC Summary DataFrame
-            wacc_summary = pd.DataFrame({
-                'WACC': [wacc_lower_ci * 100, wacc * 100, wacc_upper_ci * 100]
-            }, index=['Lower CI (95%)', 'Estimate', 'Upper CI (95%)'])
-
-            st.subheader("WACC Summary")
-            st.dataframe(wacc_summary.style.format("{:.2f}%"), use_container_width=True)
-
-            # Notification that WACC was saved
-            st.success(f"✅ WACC saved! You can now use these values in the DCF Model (Phase 3)")
-
-            # Visualization
-            fig, ax = plt.subplots(figsize=(10, 6))
-            bars = ax.bar(['Lower CI', 'Estimate', 'Upper CI'],
-                         [wacc_lower_ci * 100, wacc * 100, wacc_upper_ci * 100],
-                         color=['#FF6B6B', '#4ECDC4', '#FF6B6B'])
-
-            ax.set_ylabel('WACC (%)')
-            ax.set_title(f'WACC Estimates for {ticker_symbol}')
-            ax.grid(True, alpha=0.3, axis='y')
-
-            # Add value labels on bars
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height,
-                       f'{height:.2f}%',
-                       ha='center', va='bottom')
-
-            st.pyplot(fig)
-
-            # WACC Formula breakdown
-            with st.expander("View WACC Calculation Breakdown"):
-                st.markdown("### WACC Formula")
-                st.latex(r"WACC = w_E \times k_E + w_D \times k_D \times (1-t)")
-
-                st.markdown("### Components:")
-                breakdown_df = pd.DataFrame({
-                    'Component': ['Equity Weight (wE)', 'Cost of Equity (kE)',
-                                 'Debt Weight (wD)', 'Cost of Debt (kD)',
-                                 'Tax Rate (t)', 'After-tax Cost of Debt'],
-                    'Value': [f"{w_E:.4f}", f"{cost_of_equity:.4f}",
-                             f"{w_D:.4f}", f"{cost_of_debt:.4f}",
-                             f"{marg_tax_rate:.4f}", f"{cost_of_debt * (1 - marg_tax_rate):.4f}"]
-                })
-                st.dataframe(breakdown_df, hide_index=True, use_container_width=True)
-
-                st.markdown(f"""
-                **Calculation:**
-                - Equity portion: {w_E:.4f} × {cost_of_equity:.4f} = {w_E * cost_of_equity:.4f}
-                - Debt portion: {w_D:.4f} × {cost_of_debt:.4f} × (1 - {marg_tax_rate:.4f}) = {w_D * cost_of_debt * (1 - marg_tax_rate):.4f}
-                - **Total WACC:** {wacc:.4f} or {wacc:.2%}
-                """)
-
-        except Exception as e:
-            st.error(f"Error in calculations: {str(e)}")
-            st.exception(e)
-    else:
-        st.error("Unable to fetch data. Please check the ticker symbol and try again.")
+        # Display main WACC
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("WACC (Lower CI)", f"{wacc_lower_ci:.2%}")
+        with col2:
+            st.metric("WACC (Estimate)", f"{wacc:.2%}", help="Primary WACC estimate")
+        with col3:
+            st.metric("WACC (Upper CI)", f"{wacc_upper_ci:.2%}")
+
+        # WACC Summary DataFrame
+        wacc_summary = pd.DataFrame({
+            'WACC': [f"{wacc_lower_ci:.2%}", f"{wacc:.2%}", f"{wacc_upper_ci:.2%}"]
+        }, index=['Lower CI (95%)', 'Estimate', 'Upper CI (95%)'])
+
+        st.subheader("WACC Summary")
+        st.dataframe(wacc_summary, use_container_width=True)
+
+        # Notification that WACC was saved
+        st.success(f"✅ WACC saved! You can now use these values in the DCF Model (Phase 3)")
+
+        # Visualization
+        st.altair_chart(_wacc_bar_chart(wacc_lower_ci, wacc, wacc_upper_ci, ticker_symbol),
+                        use_container_width=True)
+
+        # WACC Formula breakdown (collapsed expanders still execute their body,
+        # so the breakdown is only built when requested)
+        if st.toggle("Show WACC Calculation Breakdown"):
+            st.markdown("### WACC Formula")
+            st.latex(r"WACC = w_E \times k_E + w_D \times k_D \times (1-t)")
+
+            st.markdown("### Components:")
+            breakdown_df = pd.DataFrame({
+                'Component': ['Equity Weight (wE)', 'Cost of Equity (kE)',
+                             'Debt Weight (wD)', 'Cost of Debt (kD)',
+                             'Tax Rate (t)', 'After-tax Cost of Debt'],
+                'Value': [f"{w_E:.4f}", f"{cost_of_equity:.4f}",
+                         f"{w_D:.4f}", f"{cost_of_debt:.4f}",
+                         f"{marg_tax_rate:.4f}", f"{cost_of_debt * (1 - marg_tax_rate):.4f}"]
+            })
+            st.dataframe(breakdown_df, hide_index=True, use_container_width=True)
+
+            st.markdown(f"""
+            **Calculation:**
+            - Equity portion: {w_E:.4f} × {cost_of_equity:.4f} = {w_E * cost_of_equity:.4f}
+            - Debt portion: {w_D:.4f} × {cost_of_debt:.4f} × (1 - {marg_tax_rate:.4f}) = {w_D * cost_of_debt * (1 - marg_tax_rate):.4f}
+            - **Total WACC:** {wacc:.4f} or {wacc:.2%}
+            """)
+
+    except Exception as e:
+        st.error(f"Error in calculations: {str(e)}")
+        st.exception(e)
 else:
     st.info("👈 Enter your parameters in the sidebar and click 'Calculate WACC' to begin.")
 
     # Display instructions
-    st.markdown("""
-    ### How to Use This Calculator
-
-    1. **Enter Ticker Symbol**: Input the stock ticker (e.g., MSFT, AAPL, GOOGL)
-    2. **Set Risk-Free Rate**: Enter the current risk-free rate (typically 10-year Treasury yield)
-    3. **Credit Rating**: Enter the firm's credit rating (e.g., Aaa/AAA, A2/A)
-    4. **Set Parameters**: Adjust EMRP, tax rate, and market index as needed
-    5. **Calculate**: Click the "Calculate WACC" button to see results
-
-    ### What is WACC?
-
-    The Weighted Average Cost of Capital (WACC) represents the average rate a company must pay to finance its assets.
-    It's calculated using the formula:
-
-    """)
+    st.markdown(_INSTRUCTIONS_MD)
     st.latex(r"WACC = w_E \times k_E + w_D \times k_D \times (1-t)")
 
-    st.markdown("""
-    Where:
-    - **wE** = Weight of equity in capital structure
-    - **kE** = Cost of equity (calculated using CAPM)
-    - **wD** = Weight of debt in capital structure
-    - **kD** = Cost of debt (risk-free rate + credit spread)
-    - **t** = Marginal tax rate
-    """)
+    st.markdown(_WACC_TERMS_MD)
@@ -1,10 +1,12 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import yfinance as yf
 
+from market_data import fetch_info
+
 # Page configuration
 st.set_page_config(
     page_title="Historical Analysis",
@@ -12,6 +14,35 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
+def _fetch_financial_data(ticker_symbol):
+    """
+    Fetch the annual statements from yfinance, cached for an hour.
+
+    Only picklable objects are returned; the Tickers (which hold an HTTP
+    session) stay local to this function.
+
+    Returns:
+        tuple: (income_statement, balance_sheet, cash_flows)
+    """
+    # Each property is a separate HTTPS request, so issue them concurrently; each
+    # task gets its own Ticker, since yfinance memoizes results on the instance
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        f_inc = ex.submit(lambda: yf.Ticker(ticker_symbol).financials)
+        f_bs = ex.submit(lambda: yf.Ticker(ticker_symbol).balance_sheet)
+        f_cf = ex.submit(lambda: yf.Ticker(ticker_symbol).cashflow)
+
+    # Transpose financial statements so dates are rows
+    income_statement = f_inc.result().T.sort_index()
+    balance_sheet = f_bs.result().T.sort_index()
+    cash_flows = f_cf.result().T.sort_index()
+
+    # Raise rather than return an empty result, so an unknown ticker isn't cached
+    if income_statement.empty:
+        raise ValueError(f"No financial statements found for {ticker_symbol}")
+
+    return income_statement, balance_sheet, cash_flows
+
 def get_financial_data(ticker_symbol):
     """
     Fetch all financial statement data from yfinance.
@@ -20,78 +51,311 @@ def get_financial_data(ticker_symbol):
         ticker_symbol (str): Stock ticker symbol
 
     Returns:
-        tuple: (ticker, income_statement, balance_sheet, cash_flows, info)
+        tuple: (income_statement, balance_sheet, cash_flows, info)
     """
     try:
-        ticker = yf.Ticker(ticker_symbol)
-        info = ticker.info
-
-        # Get financial statements and transpose so dates are rows
-        income_statement = ticker.financials.T.sort_index()
-        balance_sheet = ticker.balance_sheet.T.sort_index()
-        cash_flows = ticker.cashflow.T.sort_index()
-
-        return ticker, income_statement, balance_sheet, cash_flows, info
+        # The info dict comes from the shared cache, so the other pages reuse it
+        return (*_fetch_financial_data(ticker_symbol), fetch_info(ticker_symbol))
     except Exception as e:
+        # Raised errors are not cached, so a retry will hit Yahoo again
         st.error(f"Error fetching data: {str(e)}")
-        return None, None, None, None, None
+        return None, None, None, None
+
+def _growth(series):
+    """Period-over-period growth via shifted ndarray division (pct_change without the dispatch)."""
+    arr = series.to_numpy(dtype=float)
+    growth = np.empty_like(arr)
+    growth[:1] = np.nan
+    growth[1:] = arr[1:] / arr[:-1] - 1.0
+    return pd.Series(growth, index=series.index)
 
+@st.cache_data(max_entries=32, show_spinner=False)
 def calculate_growth_and_margins(income_statement):
     """Calculate growth rates and margins from income statement."""
-    df = income_statement.copy()
-
-    # Calculate margins
-    df['Gross Margin'] = df['Gross Profit'] / df['Total Revenue']
-    df['EBIT Margin'] = df['EBIT'] / df['Total Revenue']
-    df['EBITDA Margin'] = df['EBITDA'] / df['Total Revenue']
-
-    # Calculate growth rates
-    df['Revenue Growth'] = df['Total Revenue'].pct_change()
-    df['EBIT Growth'] = df['EBIT'].pct_change()
-
-    return df
-
+    revenue = income_statement['Total Revenue']
+    ebit = income_statement['EBIT']
+
+    # Margins and growth rates added in a single assign (no upfront copy)
+    return income_statement.assign(**{
+        'Gross Margin': income_statement['Gross Profit'] / revenue,
+        'EBIT Margin': ebit / revenue,
+        'EBITDA Margin': income_statement['EBITDA'] / revenue,
+        'Revenue Growth': _growth(revenue),
+        'EBIT Growth': _growth(ebit),
+    })
+
+@st.cache_data(max_entries=32, show_spinner=False)
 def calculate_nwc(balance_sheet):
     """Calculate Net Working Capital and changes."""
-    df = balance_sheet.copy()
-
     # Adjust Current Assets by subtracting Cash
-    df['Adj Current Assets'] = df['Current Assets'] - df['Cash Cash Equivalents And Short Term Investments']
+    adj_assets = balance_sheet['Current Assets'] - balance_sheet['Cash Cash Equivalents And Short Term Investments']
 
     # Adjust Current Liabilities by subtracting Current Debt
-    df['Adj Current Liabilities'] = df['Current Liabilities'] - df['Current Debt And Capital Lease Obligation']
-
-    # Calculate NWC
-    df['NWC'] = df['Adj Current Assets'] - df['Adj Current Liabilities']
+    adj_liabilities = balance_sheet['Current Liabilities'] - balance_sheet['Current Debt And Capital Lease Obligation']
 
-    # Calculate Change in NWC
-    df['Change in NWC'] = df['NWC'].diff()
+    # Calculate NWC and its change
+    nwc = adj_assets - adj_liabilities
 
-    return df
+    return balance_sheet.assign(**{
+        'Adj Current Assets': adj_assets,
+        'Adj Current Liabilities': adj_liabilities,
+        'NWC': nwc,
+        'Change in NWC': nwc.diff(),
+    })
 
+@st.cache_data(max_entries=32, show_spinner=False)
 def calculate_reinvestment(cash_flows_df, nwc_df, income_df, tax_rate_col):
-    """Calculate reinvestment metrics."""
-    # Make CapEx positive
-    cash_flows_df['Capital Expenditure'] = -cash_flows_df['Capital Expenditure']
-
-    # Merge dataframes
-    merged = pd.merge(cash_flows_df[['Capital Expenditure', 'Depreciation And Amortization']],
-                      nwc_df[['NWC', 'Change in NWC']],
-                      left_index=True, right_index=True, how='left')
-
-    # Calculate Reinvestment
-    merged['Reinvestment'] = (merged['Capital Expenditure'] -
-                              merged['Depreciation And Amortization'] +
-                              merged['Change in NWC'])
-
-    # Calculate NOPAT
-    merged['Tax Rate'] = income_df[tax_rate_col]
-    merged['NOPAT'] = income_df['EBIT'] * (1 - merged['Tax Rate'])
+    """Calculate reinvestment metrics. The input frames are not modified."""
+    idx = cash_flows_df.index
+
+    # Align inputs on the cash flow dates and drop to NumPy; CapEx made positive
+    capex = -cash_flows_df['Capital Expenditure'].to_numpy()
+    da = cash_flows_df['Depreciation And Amortization'].to_numpy()
+    nwc, change_nwc = nwc_df[['NWC', 'Change in NWC']].reindex(idx).to_numpy(dtype=float).T
+    tax_rate, ebit = income_df[[tax_rate_col, 'EBIT']].reindex(idx).to_numpy(dtype=float).T
+
+    # Reinvestment, NOPAT and Reinvestment Rate
+    reinvestment = capex - da + change_nwc
+    nopat = ebit * (1.0 - tax_rate)
+
+    return pd.DataFrame({
+        'Capital Expenditure': capex,
+        'Depreciation And Amortization': da,
+        'NWC': nwc,
+        'Change in NWC': change_nwc,
+        'Reinvestment': reinvestment,
+        'Tax Rate': tax_rate,
+        'NOPAT': nopat,
+        'Reinvestment Rate': reinvestment / nopat,
+    }, index=idx)
+
+def section_revenue(income_stmt, ticker_symbol, scale_factor, scale_name):
+    """Revenue and EBIT tables with trend charts."""
+    # SECTION 1: Revenue and Profitability
+    st.header("1️⃣ Revenue and Profitability Metrics")
+
+    revenue_data = income_stmt['Total Revenue'] / scale_factor
+    ebit_data = income_stmt['EBIT'] / scale_factor
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("Revenue Metrics")
+        st.dataframe(
+            revenue_data.to_frame(f'Revenue (${scale_name})').style.format("{:,.2f}"),
+            use_container_width=True
+        )
+
+        # Revenue chart
+        st.caption(f'{ticker_symbol} Revenue Trend')
+        st.line_chart(revenue_data, x_label='Year', y_label=f'Revenue (${scale_name})')
+
+    with col2:
+        st.subheader("EBIT Metrics")
+        st.dataframe(
+            ebit_data.to_frame(f'EBIT (${scale_name})').style.format("{:,.2f}"),
+            use_container_width=True
+        )
+
+        # EBIT chart
+        st.caption(f'{ticker_symbol} EBIT Trend')
+        st.line_chart(ebit_data, x_label='Year', y_label=f'EBIT (${scale_name})', color='#2E86AB')
+
+def section_growth(df_stats_pct, ticker_symbol):
+    """Revenue and EBIT growth table and bar chart."""
+    # SECTION 2: Growth Rates
+    st.header("2️⃣ Growth Rates")
+
+    growth_df_display = df_stats_pct[['Revenue Growth', 'EBIT Growth']]
+
+    st.dataframe(
+        growth_df_display.style.format("{:.2f}%"),
+        use_container_width=True
+    )
+
+    # Growth chart (grouped bars, one category per fiscal year end)
+    st.caption(f'{ticker_symbol} Growth Rates')
+    st.bar_chart(
+        growth_df_display.set_axis(growth_df_display.index.strftime('%Y-%m-%d')),
+        x_label='Year', y_label='Growth Rate (%)', stack=False
+    )
+
+def section_margins(df_stats_pct, ticker_symbol):
+    """Gross, EBIT and EBITDA margin table and chart."""
+    # SECTION 3: Margins Analysis
+    st.header("3️⃣ Profit Margins")
+
+    margins_df_display = df_stats_pct[['Gross Margin', 'EBIT Margin', 'EBITDA Margin']]
+
+    st.dataframe(
+        margins_df_display.style.format("{:.2f}%"),
+        use_container_width=True
+    )
+
+    # Margins chart
+    st.caption(f'{ticker_symbol} Profit Margins Over Time')
+    st.line_chart(margins_df_display, x_label='Year', y_label='Margin (%)')
+
+def section_nwc(balance_with_nwc, ticker_symbol, scale_factor, scale_name):
+    """Net working capital table and trend chart."""
+    # SECTION 4: Working Capital
+    st.header("4️⃣ Net Working Capital")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("NWC Values")
+        nwc_display = balance_with_nwc[['NWC', 'Change in NWC']] / scale_factor
+        st.dataframe(
+            nwc_display.style.format("{:,.2f}"),
+            use_container_width=True
+        )
+
+    with col2:
+        st.subheader("NWC Trend")
+        st.caption(f'{ticker_symbol} Net Working Capital')
+        st.line_chart(nwc_display['NWC'], x_label='Year', y_label=f'NWC (${scale_name})', color='#A23B72')
+
+def section_reinvestment(reinvestment_df, ticker_symbol, scale_factor, scale_name):
+    """Reinvestment components, NOPAT and reinvestment rate."""
+    # SECTION 5: Reinvestment Analysis
+    st.header("5️⃣ Reinvestment Analysis")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("Reinvestment Components")
+        reinvest_components = reinvestment_df[['Capital Expenditure', 'Depreciation And Amortization',
+                                               'Change in NWC', 'Reinvestment']] / scale_factor
+        st.dataframe(
+            reinvest_components.style.format("{:,.2f}"),
+            use_container_width=True
+        )
+
+    with col2:
+        st.subheader("NOPAT and Reinvestment Rate")
+        nopat_display = reinvestment_df[['NOPAT', 'Reinvestment Rate']].copy()
+        nopat_display['NOPAT'] = nopat_display['NOPAT'] / scale_factor
+
+        # Format differently for each column
+        styled_df = nopat_display.style.format({
+            'NOPAT': "{:,.2f}",
+            'Reinvestment Rate': "{:.2%}"
+        })
+        st.dataframe(styled_df, use_container_width=True)
+
+    # Reinvestment chart (grouped bars, one category per fiscal year end)
+    reinvest_chart = pd.concat([nopat_display['NOPAT'], reinvest_components['Reinvestment']], axis=1)
+    st.caption(f'{ticker_symbol} NOPAT vs Reinvestment')
+    st.bar_chart(
+        reinvest_chart.set_axis(reinvest_chart.index.strftime('%Y-%m-%d')),
+        x_label='Year', y_label=f'Amount (${scale_name})', stack=False
+    )
+
+def section_summary(df_stats):
+    """Full metrics table, averages and latest-year insights."""
+    # SECTION 6: Summary Statistics
+    st.header("6️⃣ Complete Historical Summary")
+
+    st.subheader("All Key Metrics")
+    st.dataframe(
+        df_stats.style.format({
+            'Revenue Growth': "{:.2%}",
+            'EBIT Growth': "{:.2%}",
+            'Gross Margin': "{:.2%}",
+            'EBIT Margin': "{:.2%}",
+            'EBITDA Margin': "{:.2%}",
+            'Tax Rate': "{:.2%}",
+            'Reinvestment Rate': "{:.2%}"
+        }),
+        use_container_width=True
+    )
+
+    # Summary statistics
+    with st.expander("View Statistical Summary"):
+        st.subheader("Average Metrics (Excluding First Year)")
+        avg_stats = df_stats.iloc[1:].mean()  # Skip first year due to NaN growth rates
+
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            st.metric("Avg Revenue Growth", f"{avg_stats['Revenue Growth']:.2%}")
+            st.metric("Avg EBIT Growth", f"{avg_stats['EBIT Growth']:.2%}")
+
+        with col2:
+            st.metric("Avg Gross Margin", f"{avg_stats['Gross Margin']:.2%}")
+            st.metric("Avg EBIT Margin", f"{avg_stats['EBIT Margin']:.2%}")
+            st.metric("Avg EBITDA Margin", f"{avg_stats['EBITDA Margin']:.2%}")
+
+        with col3:
+            st.metric("Avg Tax Rate", f"{avg_stats['Tax Rate']:.2%}")
+            st.metric("Avg Reinvestment Rate", f"{avg_stats['Reinvestment Rate']:.2%}")
+
+    # Key insights
+    st.subheader("📌 Key Insights")
+
+    latest_year = df_stats.index[-1].year
+    latest_revenue_growth = df_stats['Revenue Growth'].iloc[-1]
+    latest_ebit_margin = df_stats['EBIT Margin'].iloc[-1]
+    latest_reinvest_rate = df_stats['Reinvestment Rate'].iloc[-1]
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.info(f"""
+        **Latest Year ({latest_year})**
+
+        Revenue Growth: {latest_revenue_growth:.2%}
+
+        This represents the most recent year-over-year revenue change.
+        """)
+
+    with col2:
+        st.info(f"""
+        **Operating Efficiency**
+
+        EBIT Margin: {latest_ebit_margin:.2%}
+
+        Shows how much operating profit is generated per dollar of revenue.
+        """)
+
+    with col3:
+        st.info(f"""
+        **Reinvestment Strategy**
+
+        Reinvestment Rate: {latest_reinvest_rate:.2%}
+
+        Percentage of NOPAT reinvested back into the business.
+        """)
+
+@st.fragment
+def render_analysis(results):
+    """
+    Render all analysis sections from the stored results.
 
-    # Calculate Reinvestment Rate
-    merged['Reinvestment Rate'] = merged['Reinvestment'] / merged['NOPAT']
+    Runs as a fragment, so changing the display scale reruns only this
+    function rather than the whole page.
+    """
+    scale_option = st.selectbox("Display Scale", ["Millions", "Billions"], key="hist_scale")
+    scale_factor = 1000000 if scale_option == "Millions" else 1000000000
+    scale_name = "M" if scale_option == "Millions" else "B"
 
-    return merged
+    ticker_symbol = results['ticker']
+    try:
+        section_revenue(results['income_stmt'], ticker_symbol, scale_factor, scale_name)
+        st.divider()
+        section_growth(results['df_stats_pct'], ticker_symbol)
+        st.divider()
+        section_margins(results['df_stats_pct'], ticker_symbol)
+        st.divider()
+        section_nwc(results['balance_with_nwc'], ticker_symbol, scale_factor, scale_name)
+        st.divider()
+        section_reinvestment(results['reinvestment_df'], ticker_symbol, scale_factor, scale_name)
+        st.divider()
+        section_summary(results['df_stats'])
+    except Exception as e:
+        st.error(f"Error in analysis: {str(e)}")
+        st.exception(e)
 
 # Title
 st.title("📊 Historical Financial Analysis")
@@ -102,29 +366,21 @@ st.sidebar.header("Input Parameters")
 
 ticker_symbol = st.sidebar.text_input("Ticker Symbol", value="MSFT").upper()
 
-scale_option = st.sidebar.selectbox("Display Scale", ["Millions", "Billions"])
-scale_factor = 1000000 if scale_option == "Millions" else 1000000000
-scale_name = "M" if scale_option == "Millions" else "B"
-
 analyze_button = st.sidebar.button("Analyze Company", type="primary")
 
 if analyze_button:
+    # Drop the previous ticker's results so a failed fetch doesn't render them
+    st.session_state.pop('historical_analysis', None)
+
     with st.spinner(f"Fetching financial data for {ticker_symbol}..."):
-        ticker, income_stmt, balance_sheet, cash_flows, info = get_financial_data(ticker_symbol)
+        income_stmt, balance_sheet, cash_flows, info = get_financial_data(ticker_symbol)
 
-    if ticker is not None and income_stmt is not None:
+    if income_stmt is not None:
         try:
-            company_name = info.get('longName', ticker_symbol)
-            st.success(f"Successfully loaded data for {company_name}")
-
             # Calculate all metrics
             income_with_metrics = calculate_growth_and_margins(income_stmt)
             balance_with_nwc = calculate_nwc(balance_sheet)
 
-            # Create stats dataframe
-            df_stats = income_with_metrics[['Revenue Growth', 'EBIT Growth', 'Gross Margin', 'EBIT Margin', 'EBITDA Margin']].copy()
-            df_stats['Tax Rate'] = income_stmt['Tax Rate For Calcs']
-
             # Calculate reinvestment metrics
             reinvestment_df = calculate_reinvestment(
                 cash_flows,
@@ -133,269 +389,36 @@ if analyze_button:
                 'Tax Rate For Calcs'
             )
 
-            # Add Reinvestment Rate to stats
-            df_stats['Reinvestment Rate'] = reinvestment_df['Reinvestment Rate']
-
-            # SECTION 1: Revenue and Profitability
-            st.header("1️⃣ Revenue and Profitability Metrics")
-
-            col1, col2 = st.columns(2)
-
-            with col1:
-                st.subheader("Revenue Metrics")
-                revenue_data = income_stmt['Total Revenue'] / scale_factor
-                st.dataframe(
-                    revenue_data.to_frame(f'Revenue (${scale_name})').style.format("{:,.2f}"),
-                    use_container_width=True
-                )
-
-                # Revenue chart
-                fig, ax = plt.subplots(figsize=(8, 5))
-                ax.plot(revenue_data.index, revenue_data.values, marker='o', linewidth=2, markersize=8)
-                ax.set_xlabel('Year')
-                ax.set_ylabel(f'Revenue (${scale_name})')
-                ax.set_title(f'{ticker_symbol} Revenue Trend')
-                ax.grid(True, alpha=0.3)
-                plt.xticks(rotation=45)
-                st.pyplot(fig)
-
-            with col2:
-                st.subheader("EBIT Metrics")
-                ebit_data = income_stmt['EBIT'] / scale_factor
-                st.dataframe(
-                    ebit_data.to_frame(f'EBIT (${scale_name})').style.format("{:,.2f}"),
-                    use_container_width=True
-                )
-
-                # EBIT chart
-                fig, ax = plt.subplots(figsize=(8, 5))
-                ax.plot(ebit_data.index, ebit_data.values, marker='o', linewidth=2, markersize=8, color='#2E86AB')
-                ax.set_xlabel('Year')
-                ax.set_ylabel(f'EBIT (${scale_name})')
-                ax.set_title(f'{ticker_symbol} EBIT Trend')
-                ax.grid(True, alpha=0.3)
-                plt.xticks(rotation=45)
-                st.pyplot(fig)
-
-            st.divider()
-
-            # SECTION 2: Growth Rates
-            st.header("2️⃣ Growth Rates")
-
-            growth_df = df_stats[['Revenue Growth', 'EBIT Growth']].copy()
-            growth_df_display = growth_df * 100  # Convert to percentage
-
-            st.dataframe(
-                growth_df_display.style.format("{:.2f}%"),
-                use_container_width=True
-            )
-
-            # Growth chart
-            fig, ax = plt.subplots(figsize=(10, 6))
-            x = np.arange(len(growth_df.index))
-            width = 0.35
-
-            bars1 = ax.bar(x - width/2, growth_df['Revenue Growth'] * 100, width, label='Revenue Growth', alpha=0.8)
-            bars2 = ax.bar(x + width/2, growth_df['EBIT Growth'] * 100, width, label='EBIT Growth', alpha=0.8)
-
-            ax.set_xlabel('Year')
-            ax.set_ylabel('Growth Rate (%)')
-            ax.set_title(f'{ticker_symbol} Growth Rates')
-            ax.set_xticks(x)
-            ax.set_xticklabels([str(date.date()) for date in growth_df.index], rotation=45)
-            ax.legend()
-            ax.grid(True, alpha=0.3, axis='y')
-            ax.axhline(y=0, color='black', linestyle='-', linewidth=0.5)
-
-            st.pyplot(fig)
-
-            st.divider()
-
-            # SECTION 3: Margins Analysis
-            st.header("3️⃣ Profit Margins")
-
-            margins_df = df_stats[['Gross Margin', 'EBIT Margin', 'EBITDA Margin']].copy()
-            margins_df_display = margins_df * 100
-
-            st.dataframe(
-                margins_df_display.style.format("{:.2f}%"),
-                use_container_width=True
-            )
-
-            # Margins chart
-            fig, ax = plt.subplots(figsize=(10, 6))
-
-            for column in margins_df.columns:
-                ax.plot(margins_df.index, margins_df[column] * 100, marker='o', label=column, linewidth=2)
-
-            ax.set_xlabel('Year')
-            ax.set_ylabel('Margin (%)')
-            ax.set_title(f'{ticker_symbol} Profit Margins Over Time')
-            ax.legend()
-            ax.grid(True, alpha=0.3)
-            plt.xticks(rotation=45)
-
-            st.pyplot(fig)
-
-            st.divider()
-
-            # SECTION 4: Working Capital
-            st.header("4️⃣ Net Working Capital")
-
-            col1, col2 = st.columns(2)
-
-            with col1:
-                st.subheader("NWC Values")
-                nwc_display = balance_with_nwc[['NWC', 'Change in NWC']] / scale_factor
-                st.dataframe(
-                    nwc_display.style.format("{:,.2f}"),
-                    use_container_width=True
-                )
-
-            with col2:
-                st.subheader("NWC Trend")
-                fig, ax = plt.subplots(figsize=(8, 5))
-                nwc_values = balance_with_nwc['NWC'] / scale_factor
-                ax.plot(nwc_values.index, nwc_values.values, marker='o', linewidth=2, markersize=8, color='#A23B72')
-                ax.set_xlabel('Year')
-                ax.set_ylabel(f'NWC (${scale_name})')
-                ax.set_title(f'{ticker_symbol} Net Working Capital')
-                ax.grid(True, alpha=0.3)
-                plt.xticks(rotation=45)
-                st.pyplot(fig)
-
-            st.divider()
-
-            # SECTION 5: Reinvestment Analysis
-            st.header("5️⃣ Reinvestment Analysis")
-
-            col1, col2 = st.columns(2)
-
-            with col1:
-                st.subheader("Reinvestment Components")
-                reinvest_components = reinvestment_df[['Capital Expenditure', 'Depreciation And Amortization',
-                                                       'Change in NWC', 'Reinvestment']] / scale_factor
-                st.dataframe(
-                    reinvest_components.style.format("{:,.2f}"),
-                    use_container_width=True
-                )
-
-            with col2:
-                st.subheader("NOPAT and Reinvestment Rate")
-                nopat_display = reinvestment_df[['NOPAT', 'Reinvestment Rate']].copy()
-                nopat_display['NOPAT'] = nopat_display['NOPAT'] / scale_factor
-
-                # Format differently for each column
-                styled_df = nopat_display.style.format({
-                    'NOPAT': "{:,.2f}",
-                    'Reinvestment Rate': "{:.2%}"
-                })
-                st.dataframe(styled_df, use_container_width=True)
-
-            # Reinvestment chart
-            fig, ax = plt.subplots(figsize=(10, 6))
-
-            reinvest_values = reinvestment_df['Reinvestment'] / scale_factor
-            nopat_values = reinvestment_df['NOPAT'] / scale_factor
-
-            x = np.arange(len(reinvest_values.index))
-            width = 0.35
-
-            bars1 = ax.bar(x - width/2, nopat_values, width, label='NOPAT', alpha=0.8)
-            bars2 = ax.bar(x + width/2, reinvest_values, width, label='Reinvestment', alpha=0.8)
-
-            ax.set_xlabel('Year')
-            ax.set_ylabel(f'Amount (${scale_name})')
-            ax.set_title(f'{ticker_symbol} NOPAT vs Reinvestment')
-            ax.set_xticks(x)
-            ax.set_xticklabels([str(date.date()) for date in reinvest_values.index], rotation=45)
-            ax.legend()
-            ax.grid(True, alpha=0.3, axis='y')
-
-            st.pyplot(fig)
-
-            st.divider()
-
-            # SECTION 6: Summary Statistics
-            st.header("6️⃣ Complete Historical Summary")
-
-            st.subheader("All Key Metrics")
-            st.dataframe(
-                df_stats.style.format({
-                    'Revenue Growth': "{:.2%}",
-                    'EBIT Growth': "{:.2%}",
-                    'Gross Margin': "{:.2%}",
-                    'EBIT Margin': "{:.2%}",
-                    'EBITDA Margin': "{:.2%}",
-                    'Tax Rate': "{:.2%}",
-                    'Reinvestment Rate': "{:.2%}"
-                }),
-                use_container_width=True
-            )
-
-            # Summary statistics
-            with st.expander("View Statistical Summary"):
-                st.subheader("Average Metrics (Excluding First Year)")
-                avg_stats = df_stats.iloc[1:].mean()  # Skip first year due to NaN growth rates
-
-                col1, col2, col3 = st.columns(3)
-
-                with col1:
-                    st.metric("Avg Revenue Growth", f"{avg_stats['Revenue Growth']:.2%}")
-                    st.metric("Avg EBIT Growth", f"{avg_stats['EBIT Growth']:.2%}")
-
-                with col2:
-                    st.metric("Avg Gross Margin", f"{avg_stats['Gross Margin']:.2%}")
-                    st.metric("Avg EBIT Margin", f"{avg_stats['EBIT Margin']:.2%}")
-                    st.metric("Avg EBITDA Margin", f"{avg_stats['EBITDA Margin']:.2%}")
-
-                with col3:
-                    st.metric("Avg Tax Rate", f"{avg_stats['Tax Rate']:.2%}")
-                    st.metric("Avg Reinvestment Rate", f"{avg_stats['Reinvestment Rate']:.2%}")
-
-            # Key insights
-            st.subheader("📌 Key Insights")
-
-            latest_year = df_stats.index[-1].year
-            latest_revenue_growth = df_stats['Revenue Growth'].iloc[-1]
-            latest_ebit_margin = df_stats['EBIT Margin'].iloc[-1]
-            latest_reinvest_rate = df_stats['Reinvestment Rate'].iloc[-1]
-
-            col1, col2, col3 = st.columns(3)
-
-            with col1:
-                st.info(f"""
-                **Latest Year ({latest_year})**
-
-                Revenue Growth: {latest_revenue_growth:.2%}
-
-                This represents the most recent year-over-year revenue change.
-                """)
-
-            with col2:
-                st.info(f"""
-                **Operating Efficiency**
-
-                EBIT Margin: {latest_ebit_margin:.2%}
-
-                Shows how much operating profit is generated per dollar of revenue.
-                """)
-
-            with col3:
-                st.info(f"""
-                **Reinvestment Strategy**
-
-                Reinvestment Rate: {latest_reinvest_rate:.2%}
-
-                Percentage of NOPAT reinvested back into the business.
-                """)
-
+            # Create stats dataframe from the already-aligned Series in one concat
+            df_stats = pd.concat([
+                income_with_metrics[['Revenue Growth', 'EBIT Growth', 'Gross Margin', 'EBIT Margin', 'EBITDA Margin']],
+                income_stmt['Tax Rate For Calcs'].rename('Tax Rate'),
+                # Cash flow dates can differ; keep the income statement rows
+                reinvestment_df['Reinvestment Rate'].reindex(income_stmt.index),
+            ], axis=1)
+
+            # Keep the results across reruns so the display fragment can redraw them
+            st.session_state.historical_analysis = {
+                'ticker': ticker_symbol,
+                'company_name': info.get('longName', ticker_symbol),
+                'income_stmt': income_stmt,
+                'balance_with_nwc': balance_with_nwc,
+                'reinvestment_df': reinvestment_df,
+                'df_stats': df_stats,
+                # Percentage view shared by the growth and margin tables/charts
+                'df_stats_pct': df_stats * 100,
+            }
         except Exception as e:
             st.error(f"Error in analysis: {str(e)}")
             st.exception(e)
     else:
         st.error("Unable to fetch financial data. Please check the ticker symbol and try again.")
-else:
+
+if 'historical_analysis' in st.session_state:
+    results = st.session_state.historical_analysis
+    st.success(f"Successfully loaded data for {results['company_name']}")
+    render_analysis(results)
+elif not analyze_button:
     st.info("👈 Enter a ticker symbol in the sidebar and click 'Analyze Company' to begin.")
 
     # Display instructions
@@ -403,7 +426,7 @@ else:
     ### How to Use This Tool
 
     1. **Enter Ticker Symbol**: Input the stock ticker (e.g., MSFT, AAPL, GOOGL)
-    2. **Select Display Scale**: Choose between Millions or Billions
+    2. **Select Display Scale**: Choose between Millions or Billions above the results
     3. **Click Analyze**: View comprehensive historical financial analysis
 
     ### What This Analysis Provides
@@ -1,9 +1,14 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import yfinance as yf
 
+from market_data import fetch_info
+
 # Page configuration
 st.set_page_config(
     page_title="DCF Model",
@@ -11,6 +16,62 @@ st.set_page_config(
     layout="wide"
 )
 
+# Chart constants, built once at import rather than on every rerun
+_PROJECTION_SERIES = ('Revenue', 'EBIT', 'NOPAT', 'FCF')
+_PROJECTION_MARKERS = 'os^d'
+_WATERFALL_ITEMS = ('PV of FCF', 'PV of TV', 'Enterprise Value', '- Net Debt', 'Equity Value')
+_WATERFALL_COLORS = ('#2E86AB', '#A23B72', '#4ECDC4', '#FF6B6B', '#06D6A0')
+
+# Only the company fields the model uses; built outside the cached functions because
+# classes defined in a page script cannot be unpickled on the next rerun
+CompanyInfo = namedtuple('CompanyInfo', 'ltm_revenue most_recent_date shares_outstanding '
+                                        'long_name total_debt total_cash current_price')
+
+@st.cache_data(ttl=1800, show_spinner=False)
+def _fetch_ltm_data(ticker_symbol):
+    """
+    Sum the last four quarters of revenue and fetch one year of daily prices, cached for 30 minutes.
+
+    Returns:
+        tuple: (ltm_revenue, most_recent_date, historical_data)
+    """
+    # Statement and price history are independent requests; each thread gets its own
+    # Ticker, since yfinance memoizes results on the instance
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        f_quarterly = ex.submit(lambda: yf.Ticker(ticker_symbol).quarterly_income_stmt)
+        f_history = ex.submit(lambda: yf.Ticker(ticker_symbol).history(period="1y", auto_adjust=False))
+
+    # Get quarterly income statement and keep last 4 quarters
+    ltm_data = f_quarterly.result().T.sort_index().iloc[-4:]
+    historical_data = f_history.result()
+
+    # Raise rather than return empty frames, since st.cache_data does not cache exceptions
+    if ltm_data.empty or 'Total Revenue' not in ltm_data:
+        raise ValueError(f"No quarterly revenue found for {ticker_symbol}")
+    if historical_data.empty:
+        raise ValueError(f"No price history found for {ticker_symbol}")
+
+    # Sum revenue for LTM; most recent quarter end dates the LTM window
+    return ltm_data['Total Revenue'].sum(), pd.Timestamp(ltm_data.index[-1]), historical_data
+
+def _info_fields(info, ticker_symbol):
+    """
+    Pick the fields used from a yfinance info dict.
+
+    fetch_info already raises on a missing share count; missing debt or cash
+    is treated as zero.
+
+    Returns:
+        tuple: (shares_outstanding, long_name, total_debt, total_cash, current_price)
+    """
+    return (
+        info['sharesOutstanding'],
+        info.get('longName', ticker_symbol),
+        info.get('totalDebt') or 0,
+        info.get('totalCash') or 0,
+        info.get('currentPrice') or info.get('regularMarketPrice') or 0.0,
+    )
+
 def get_ltm_data(ticker_symbol):
     """
     Get Last Twelve Months (LTM) data from quarterly financials.
@@ -19,41 +80,22 @@ def get_ltm_data(ticker_symbol):
         ticker_symbol (str): Stock ticker symbol
 
     Returns:
-        tuple: (ticker, ltm_revenue, most_recent_date, shares_outstanding, info)
+        tuple: (CompanyInfo, historical_data), or (None, None) if the fetch failed
     """
     try:
-        ticker = yf.Ticker(ticker_symbol)
-        info = ticker.info
-
-        # Get quarterly income statement
-        ltm_data = ticker.quarterly_income_stmt.T.sort_index()
-
-        # Keep last 4 quarters
-        ltm_data = ltm_data.iloc[-4:]
+        ltm_revenue, most_recent_date, historical_data = _fetch_ltm_data(ticker_symbol)
+        fields = _info_fields(fetch_info(ticker_symbol), ticker_symbol)
 
-        # Sum revenue for LTM
-        ltm_revenue = ltm_data['Total Revenue'].sum()
-
-        # Get most recent date
-        most_recent_date = ltm_data.index[-1]
-
-        # Get shares outstanding
-        shares_outstanding = info.get('sharesOutstanding', 0)
-
-        return ticker, ltm_revenue, most_recent_date, shares_outstanding, info
+        return CompanyInfo(ltm_revenue, most_recent_date, *fields), historical_data
     except Exception as e:
         st.error(f"Error fetching data: {str(e)}")
-        return None, None, None, None, None
+        return None, None
 
 def create_projection_dates(most_recent_date, num_years):
     """Create projection dates based on most recent date."""
-    freq_dict = {1:'YE-JAN',2:'YE-FEB',3:'YE-MAR',4:'YE-APR', 5:'YE-MAY',6:'YE-JUN',
-                 7:'YE-JUL',8:'YE-AUG', 9:'YE-SEP',10:'YE-OCT',11:'YE-NOV',12:'YE-DEC'}
-
-    f = freq_dict[most_recent_date.month]
-    new_dates = pd.date_range(start=most_recent_date, periods=num_years+1, freq=f)
-
-    return new_dates[1:]  # Exclude T=0
+    # Fiscal year ends fall on the month end of the LTM quarter; step whole years from there
+    base = pd.Timestamp(most_recent_date) + pd.offsets.MonthEnd(0)
+    return pd.DatetimeIndex([base + pd.DateOffset(years=i) for i in range(1, num_years + 1)])
 
 def project_financials(ltm_revenue, growth_pattern, ebit_margin_pattern,
                        reinv_rate_pattern, tax_rate, projection_dates):
@@ -71,36 +113,40 @@ def project_financials(ltm_revenue, growth_pattern, ebit_margin_pattern,
     Returns:
         DataFrame with projections
     """
-    projection = pd.DataFrame(index=projection_dates, data={
-        'Revenue Growth': growth_pattern,
-        'EBIT Margin': ebit_margin_pattern,
-        'Reinv Rate': reinv_rate_pattern
-    })
-
-    # Calculate Revenue projections
-    projection['Revenue'] = ltm_revenue * (1 + projection['Revenue Growth']).cumprod()
-
-    # Calculate EBIT
-    projection['EBIT'] = projection['Revenue'] * projection['EBIT Margin']
-
-    # Calculate NOPAT
-    projection['NOPAT'] = projection['EBIT'] * (1 - tax_rate)
-
-    # Calculate FCF
-    projection['FCF'] = projection['NOPAT'] * (1 - projection['Reinv Rate'])
-
-    return projection
+    g = np.asarray(growth_pattern, dtype=float)
+    m = np.asarray(ebit_margin_pattern, dtype=float)
+    r = np.asarray(reinv_rate_pattern, dtype=float)
+
+    # Revenue, EBIT, NOPAT and FCF on contiguous arrays; one DataFrame at the end
+    revenue = ltm_revenue * np.cumprod(1.0 + g)
+    ebit = revenue * m
+    nopat = ebit * (1.0 - tax_rate)
+    fcf = nopat * (1.0 - r)
+
+    return pd.DataFrame({
+        'Revenue Growth': g,
+        'EBIT Margin': m,
+        'Reinv Rate': r,
+        'Revenue': revenue,
+        'EBIT': ebit,
+        'NOPAT': nopat,
+        'FCF': fcf
+    }, index=projection_dates)
+
+def discount_factors(wacc, num_periods):
+    """Per-period discount factors 1/(1+wacc)^t, t = 1..n, as a running product (no pow calls)."""
+    return np.cumprod(np.full(num_periods, 1.0 / (1.0 + wacc)))
 
 def discount_cash_flows(projection, wacc):
     """Discount future cash flows to present value."""
-    periods = np.arange(1, len(projection) + 1)
-    projection['Discounted FCF'] = projection['FCF'] / (1 + wacc) ** periods
+    projection['Discount Factor'] = discount_factors(wacc, len(projection))
+    projection['Discounted FCF'] = projection['FCF'].to_numpy() * projection['Discount Factor'].to_numpy()
     return projection
 
-def calculate_terminal_value(final_fcf, wacc, terminal_growth, num_periods):
-    """Calculate terminal value using Gordon Growth Model."""
+def calculate_terminal_value(final_fcf, wacc, terminal_growth, final_discount):
+    """Calculate terminal value using Gordon Growth Model, discounted by the final-period factor."""
     terminal_value = final_fcf * (1 + terminal_growth) / (wacc - terminal_growth)
-    pv_terminal = terminal_value / (1 + wacc) ** num_periods
+    pv_terminal = terminal_value * final_discount
     return terminal_value, pv_terminal
 
 def calculate_share_price(pv_fcf_sum, pv_terminal, total_debt, total_cash, shares_outstanding):
@@ -110,6 +156,54 @@ def calculate_share_price(pv_fcf_sum, pv_terminal, total_debt, total_cash, share
     share_price = equity_value / shares_outstanding
     return firm_value, equity_value, share_price
 
+def _dcf_core(ltm_revenue, g, m, r, tax_rate, wacc, terminal_growth, total_debt, total_cash, shares):
+    """
+    Implied share price for one WACC, written as a single loop for numba.
+
+    Fuses project_financials, discounting, the terminal value and the share
+    price so that WACC x terminal-growth grids can be swept without any
+    DataFrame round-trips.
+    """
+    n = g.shape[0]
+    revenue = ltm_revenue
+    discount = 1.0
+    pv_fcf = 0.0
+    fcf = 0.0
+    for i in range(n):
+        revenue *= 1.0 + g[i]
+        fcf = revenue * m[i] * (1.0 - tax_rate) * (1.0 - r[i])
+        discount /= 1.0 + wacc
+        pv_fcf += fcf * discount
+
+    terminal_value = fcf * (1.0 + terminal_growth) / (wacc - terminal_growth)
+    return (pv_fcf + terminal_value * discount - total_debt + total_cash) / shares
+
+@st.cache_resource(show_spinner=False)
+def _dcf_kernel():
+    """
+    numba-compiled _dcf_core when numba is installed, else the plain Python loop.
+
+    Compiled with NumPy's error model (and without fastmath, which assumes no
+    infinities) so that wacc == terminal growth or zero shares give inf like
+    the main path instead of raising ZeroDivisionError.
+    """
+    try:
+        import numba
+    except ImportError:
+        return _dcf_core
+    return numba.njit(cache=True, error_model='numpy')(_dcf_core)
+
+def interpolate_pattern(initial, final, num_years, method):
+    """
+    Year-by-year path from the Year 1 value to the final-year value.
+
+    Exponential interpolation (constant ratio between years) needs both ends
+    positive; otherwise it falls back to linear.
+    """
+    if method == "Exponential" and initial > 0 and final > 0:
+        return np.geomspace(initial, final, num_years)
+    return np.linspace(initial, final, num_years)
+
 # Title
 st.title("💰 DCF Valuation Model")
 st.markdown("Complete Discounted Cash Flow valuation with projected cash flows and share price estimation")
@@ -135,40 +229,21 @@ st.sidebar.subheader("📈 Revenue Growth")
 initial_growth = st.sidebar.slider("Year 1 Growth (%)", min_value=0.0, max_value=50.0, value=15.0, step=0.5) / 100
 final_growth = st.sidebar.slider("Final Year Growth (%)", min_value=0.0, max_value=30.0, value=6.0, step=0.5) / 100
 
-if interpolation_method == "Linear":
-    growth_pattern = np.linspace(initial_growth, final_growth, num_years).tolist()
-else:
-    # Exponential decay from initial to final
-    decay_rate = np.log(final_growth / initial_growth) / (num_years - 1) if initial_growth > 0 else 0
-    growth_pattern = [initial_growth * np.exp(decay_rate * i) for i in range(num_years)]
+growth_pattern = interpolate_pattern(initial_growth, final_growth, num_years, interpolation_method)
 
 # EBIT Margin
 st.sidebar.subheader("💰 EBIT Margin")
 initial_ebit = st.sidebar.slider("Year 1 EBIT Margin (%)", min_value=0.0, max_value=100.0, value=46.0, step=0.5) / 100
 final_ebit = st.sidebar.slider("Final Year EBIT Margin (%)", min_value=0.0, max_value=100.0, value=46.0, step=0.5) / 100
 
-if interpolation_method == "Linear":
-    ebit_margin_pattern = np.linspace(initial_ebit, final_ebit, num_years).tolist()
-else:
-    if initial_ebit > 0 and final_ebit > 0:
-        decay_rate = np.log(final_ebit / initial_ebit) / (num_years - 1)
-        ebit_margin_pattern = [initial_ebit * np.exp(decay_rate * i) for i in range(num_years)]
-    else:
-        ebit_margin_pattern = np.linspace(initial_ebit, final_ebit, num_years).tolist()
+ebit_margin_pattern = interpolate_pattern(initial_ebit, final_ebit, num_years, interpolation_method)
 
 # Reinvestment Rate
 st.sidebar.subheader("🔄 Reinvestment Rate")
 initial_reinv = st.sidebar.slider("Year 1 Reinvestment (%)", min_value=0.0, max_value=100.0, value=40.0, step=0.5) / 100
 final_reinv = st.sidebar.slider("Final Year Reinvestment (%)", min_value=0.0, max_value=100.0, value=20.0, step=0.5) / 100
 
-if interpolation_method == "Linear":
-    reinv_rate_pattern = np.linspace(initial_reinv, final_reinv, num_years).tolist()
-else:
-    if initial_reinv > 0 and final_reinv > 0:
-        decay_rate = np.log(final_reinv / initial_reinv) / (num_years - 1)
-        reinv_rate_pattern = [initial_reinv * np.exp(decay_rate * i) for i in range(num_years)]
-    else:
-        reinv_rate_pattern = np.linspace(initial_reinv, final_reinv, num_years).tolist()
+reinv_rate_pattern = interpolate_pattern(initial_reinv, final_reinv, num_years, interpolation_method)
 
 st.sidebar.divider()
 
@@ -214,254 +289,333 @@ scale_option = st.sidebar.selectbox("Display Scale", ["Millions", "Billions"])
 scale_factor = 1000000 if scale_option == "Millions" else 1000000000
 scale_name = "M" if scale_option == "Millions" else "B"
 
-calculate_button = st.sidebar.button("Calculate Valuation", type="primary")
+def _money(value):
+    """Dollar amount in the selected display scale, e.g. $1,234.56B."""
+    return f"${value / scale_factor:,.2f}{scale_name}"
 
-if calculate_button:
-    with st.spinner(f"Fetching data for {ticker_symbol}..."):
-        ticker, ltm_revenue, most_recent_date, shares_outstanding, info = get_ltm_data(ticker_symbol)
-
-    if ticker is not None and ltm_revenue is not None:
-        try:
-            company_name = info.get('longName', ticker_symbol)
-            total_debt = info.get('totalDebt', 0)
-            total_cash = info.get('totalCash', 0)
-
-            st.success(f"Successfully loaded data for {company_name}")
+calculate_button = st.sidebar.button("Calculate Valuation", type="primary")
 
-            # SECTION 1: Starting Point
-            st.header("1️⃣ Starting Point - LTM Data")
+# Assumptions that determine the valuation; the display scale is deliberately excluded
+params_key = hash((ticker_symbol, num_years, tuple(growth_pattern), tuple(ebit_margin_pattern),
+                   tuple(reinv_rate_pattern), tax_rate, terminal_growth, wacc, wacc_lower, wacc_upper))
 
-            col1, col2, col3 = st.columns(3)
+if calculate_button:
+    # Drop the previous results so a failed recalculation doesn't render them
+    st.session_state.pop('dcf_results', None)
 
-            with col1:
-                st.metric("LTM Revenue", f"${ltm_revenue/scale_factor:,.2f}{scale_name}")
-                st.caption(f"Last Twelve Months ending {most_recent_date.date()}")
+    # Figures drawn for an earlier run of the same assumptions may show stale data
+    dcf_figs = st.session_state.get('dcf_figs', {})
+    for key in [k for k in dcf_figs if k[0] == params_key]:
+        del dcf_figs[key]
 
-            with col2:
-                st.metric("Shares Outstanding", f"{shares_outstanding/1000000:,.2f}M")
-                st.caption("Current shares outstanding")
+    with st.spinner(f"Fetching data for {ticker_symbol}..."):
+        company, historical_data = get_ltm_data(ticker_symbol)
 
-            with col3:
-                st.metric("Net Debt", f"${(total_debt - total_cash)/scale_factor:,.2f}{scale_name}")
-                st.caption(f"Debt: ${total_debt/scale_factor:,.2f}{scale_name} | Cash: ${total_cash/scale_factor:,.2f}{scale_name}")
+    if company is not None:
+        try:
+            ltm_revenue = company.ltm_revenue
+            shares_outstanding = company.shares_outstanding
+            total_debt = company.total_debt
+            total_cash = company.total_cash
 
-            st.divider()
+            # Project and discount cash flows
+            projection_dates = create_projection_dates(company.most_recent_date, num_years)
+            projection = project_financials(
+                ltm_revenue, growth_pattern, ebit_margin_pattern,
+                reinv_rate_pattern, tax_rate, projection_dates
+            )
+            projection = discount_cash_flows(projection, wacc)
+            fcf_arr = projection['FCF'].to_numpy()
+            total_pv_fcf = projection['Discounted FCF'].to_numpy().sum()
 
-            # SECTION 2: Assumptions
-            st.header("2️⃣ Projection Assumptions")
+            # Terminal value and valuation
+            final_fcf = fcf_arr[-1]
+            terminal_value, pv_terminal = calculate_terminal_value(
+                final_fcf, wacc, terminal_growth, projection['Discount Factor'].to_numpy()[-1]
+            )
+            firm_value, equity_value, share_price = calculate_share_price(
+                total_pv_fcf, pv_terminal, total_debt, total_cash, shares_outstanding
+            )
 
-            # Create projection dates
-            projection_dates = create_projection_dates(most_recent_date, num_years)
+            # Sensitivity: share price at the three WACC values
+            dcf_kernel = _dcf_kernel()
+            g_arr = np.asarray(growth_pattern, dtype=float)
+            m_arr = np.asarray(ebit_margin_pattern, dtype=float)
+            r_arr = np.asarray(reinv_rate_pattern, dtype=float)
+            share_prices = [
+                float(dcf_kernel(float(ltm_revenue), g_arr, m_arr, r_arr, tax_rate, current_wacc,
+                                 terminal_growth, float(total_debt), float(total_cash),
+                                 float(shares_outstanding)))
+                for current_wacc in (wacc_lower, wacc, wacc_upper)
+            ]
 
-            # Show assumptions table
-            assumptions_df = pd.DataFrame({
-                'Year': range(1, num_years + 1),
-                'Revenue Growth': [f"{g:.1%}" for g in growth_pattern],
-                'EBIT Margin': [f"{m:.1%}" for m in ebit_margin_pattern],
-                'Reinvestment Rate': [f"{r:.1%}" for r in reinv_rate_pattern]
+            # Keep everything the display needs, keyed on the assumptions used
+            st.session_state.dcf_results = (params_key, {
+                'company': company,
+                'projection': projection,
+                'total_pv_fcf': total_pv_fcf,
+                'final_fcf': final_fcf,
+                'terminal_value': terminal_value,
+                'pv_terminal': pv_terminal,
+                'firm_value': firm_value,
+                'equity_value': equity_value,
+                'share_price': share_price,
+                'share_prices': share_prices,
+                'historical_data': historical_data,
             })
+        except Exception as e:
+            st.error(f"Error in calculations: {str(e)}")
+            st.exception(e)
+    else:
+        st.error("Unable to fetch data. Please check the ticker symbol and try again.")
 
-            st.dataframe(assumptions_df, use_container_width=True, hide_index=True)
-
-            # Visualize assumptions
-            fig, axes = plt.subplots(1, 3, figsize=(15, 4))
-
-            years = range(1, num_years + 1)
-
-            axes[0].plot(years, [g*100 for g in growth_pattern], marker='o', color='#2E86AB', linewidth=2)
-            axes[0].set_title('Revenue Growth Rate')
-            axes[0].set_xlabel('Year')
-            axes[0].set_ylabel('Growth Rate (%)')
-            axes[0].grid(True, alpha=0.3)
-
-            axes[1].plot(years, [m*100 for m in ebit_margin_pattern], marker='o', color='#A23B72', linewidth=2)
-            axes[1].set_title('EBIT Margin')
-            axes[1].set_xlabel('Year')
-            axes[1].set_ylabel('Margin (%)')
-            axes[1].grid(True, alpha=0.3)
-
-            axes[2].plot(years, [r*100 for r in reinv_rate_pattern], marker='o', color='#F77F00', linewidth=2)
-            axes[2].set_title('Reinvestment Rate')
-            axes[2].set_xlabel('Year')
-            axes[2].set_ylabel('Rate (%)')
-            axes[2].grid(True, alpha=0.3)
-
-            plt.tight_layout()
-            st.pyplot(fig)
-
-            st.divider()
+# Render from stored results; reruns that only change the display scale skip all computation
+stored_results = st.session_state.get('dcf_results')
 
-            # SECTION 3: Projections
-            st.header("3️⃣ Financial Projections")
+if stored_results is not None and stored_results[0] == params_key:
+    try:
+        r = stored_results[1]
+        # By field name, so adding or reordering CompanyInfo fields can't swap values
+        company = r['company']
+        ltm_revenue = company.ltm_revenue
+        most_recent_date = company.most_recent_date
+        shares_outstanding = company.shares_outstanding
+        company_name = company.long_name
+        total_debt = company.total_debt
+        total_cash = company.total_cash
+        current_price = company.current_price
+        projection = r['projection']
+        total_pv_fcf = r['total_pv_fcf']
+        final_fcf = r['final_fcf']
+        terminal_value = r['terminal_value']
+        pv_terminal = r['pv_terminal']
+        firm_value = r['firm_value']
+        equity_value = r['equity_value']
+        share_price = r['share_price']
+        share_prices = r['share_prices']
+        historical_data = r['historical_data']
+
+        # Figures already drawn for these results at this scale are reused on reruns;
+        # keep at most two result/scale combinations (e.g. Millions and Billions)
+        dcf_figs = st.session_state.setdefault('dcf_figs', {})
+        figs = dcf_figs.setdefault((params_key, scale_factor), {})
+        while len(dcf_figs) > 2:
+            dcf_figs.pop(next(iter(dcf_figs)))
+
+        st.success(f"Successfully loaded data for {company_name}")
+
+        # SECTION 1: Starting Point
+        st.header("1️⃣ Starting Point - LTM Data")
+
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            st.metric("LTM Revenue", _money(ltm_revenue))
+            st.caption(f"Last Twelve Months ending {most_recent_date.date()}")
+
+        with col2:
+            st.metric("Shares Outstanding", f"{shares_outstanding/1000000:,.2f}M")
+            st.caption("Current shares outstanding")
+
+        with col3:
+            st.metric("Net Debt", _money(total_debt - total_cash))
+            st.caption(f"Debt: {_money(total_debt)} | Cash: {_money(total_cash)}")
+
+        st.divider()
+
+        # SECTION 2: Assumptions
+        st.header("2️⃣ Projection Assumptions")
+
+        # Pattern arrays shared by the table and the charts
+        growth_arr = np.asarray(growth_pattern)
+        ebit_arr = np.asarray(ebit_margin_pattern)
+        reinv_arr = np.asarray(reinv_rate_pattern)
+
+        # Year positions and tick labels shared by the projection charts
+        years_idx = np.arange(num_years)
+        year_labels = tuple(f"Y{i+1}" for i in range(num_years))
+
+        # Show assumptions table (numeric, formatted on display)
+        assumptions_df = pd.DataFrame({
+            'Year': np.arange(1, num_years + 1),
+            'Revenue Growth': growth_arr,
+            'EBIT Margin': ebit_arr,
+            'Reinvestment Rate': reinv_arr
+        })
+
+        st.dataframe(
+            assumptions_df.style.format({
+                'Revenue Growth': "{:.1%}",
+                'EBIT Margin': "{:.1%}",
+                'Reinvestment Rate': "{:.1%}"
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+
+        # Visualize assumptions (client-side Vega-Lite charts, one panel per pattern)
+        years = pd.Index(years_idx + 1, name='Year')
+        assumption_panels = (
+            ('Revenue Growth Rate', growth_arr, 'Growth Rate (%)', '#2E86AB'),
+            ('EBIT Margin', ebit_arr, 'Margin (%)', '#A23B72'),
+            ('Reinvestment Rate', reinv_arr, 'Rate (%)', '#F77F00'),
+        )
+        for col, (title, values, y_label, color) in zip(st.columns(3), assumption_panels):
+            with col:
+                st.caption(title)
+                st.line_chart(pd.Series(values * 100, index=years, name=title),
+                              x_label='Year', y_label=y_label, color=color, height=250)
+
+        st.divider()
+
+        # SECTION 3: Projections
+        st.header("3️⃣ Financial Projections")
+
+        # Display projections
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.subheader("Projection Ratios")
+            ratio_df_display = projection[['Revenue Growth', 'EBIT Margin', 'Reinv Rate']] * 100
+            st.dataframe(
+                ratio_df_display.style.format("{:.2f}%"),
+                use_container_width=True
+            )
 
-            # Project financials
-            projection = project_financials(
-                ltm_revenue, growth_pattern, ebit_margin_pattern,
-                reinv_rate_pattern, tax_rate, projection_dates
+        with col2:
+            st.subheader("Projected Values")
+            values_df = projection[list(_PROJECTION_SERIES)] / scale_factor
+            st.dataframe(
+                values_df.style.format("${:,.2f}"),
+                use_container_width=True
             )
 
-            # Display projections
-            col1, col2 = st.columns(2)
-
-            with col1:
-                st.subheader("Projection Ratios")
-                ratio_df = projection[['Revenue Growth', 'EBIT Margin', 'Reinv Rate']].copy()
-                ratio_df_display = ratio_df * 100
-                st.dataframe(
-                    ratio_df_display.style.format("{:.2f}%"),
-                    use_container_width=True
-                )
-
-            with col2:
-                st.subheader("Projected Values")
-                values_df = projection[['Revenue', 'EBIT', 'NOPAT', 'FCF']].copy() / scale_factor
-                st.dataframe(
-                    values_df.style.format("${:,.2f}"),
-                    use_container_width=True
-                )
-
-            # Visualize projections
+        # Visualize projections
+        if 'projections' not in figs:
             fig, ax = plt.subplots(figsize=(12, 6))
 
-            years_idx = range(len(projection))
-            ax.plot(years_idx, projection['Revenue']/scale_factor, marker='o', label='Revenue', linewidth=2)
-            ax.plot(years_idx, projection['EBIT']/scale_factor, marker='s', label='EBIT', linewidth=2)
-            ax.plot(years_idx, projection['NOPAT']/scale_factor, marker='^', label='NOPAT', linewidth=2)
-            ax.plot(years_idx, projection['FCF']/scale_factor, marker='d', label='FCF', linewidth=2)
+            lines = ax.plot(years_idx, projection[list(_PROJECTION_SERIES)].to_numpy() / scale_factor, linewidth=2)
+            for line, marker in zip(lines, _PROJECTION_MARKERS):
+                line.set_marker(marker)
 
             ax.set_xlabel('Year')
             ax.set_ylabel(f'Amount (${scale_name})')
             ax.set_title(f'{ticker_symbol} Financial Projections')
-            ax.legend()
+            ax.legend(lines, _PROJECTION_SERIES)
             ax.grid(True, alpha=0.3)
-            ax.set_xticks(years_idx)
-            ax.set_xticklabels([f"Y{i+1}" for i in years_idx])
+            ax.set_xticks(years_idx, year_labels)
 
-            st.pyplot(fig)
+            figs['projections'] = fig
+            plt.close(fig)  # st.pyplot only needs the Figure, not pyplot's registry entry
+        st.pyplot(figs['projections'])
 
-            st.divider()
+        st.divider()
 
-            # SECTION 4: Discounted Cash Flows
-            st.header("4️⃣ Discounted Cash Flows")
+        # SECTION 4: Discounted Cash Flows
+        st.header("4️⃣ Discounted Cash Flows")
 
-            st.info(f"📊 Using WACC of {wacc:.2%} to discount future cash flows")
-
-            # Discount cash flows
-            projection = discount_cash_flows(projection, wacc)
-
-            # Display DCF
-            dcf_df = projection[['FCF', 'Discounted FCF']].copy() / scale_factor
-            st.dataframe(
-                dcf_df.style.format("${:,.2f}"),
-                use_container_width=True
-            )
+        st.info(f"📊 Using WACC of {wacc:.2%} to discount future cash flows")
 
-            # Calculate totals
-            total_pv_fcf = projection['Discounted FCF'].sum()
+        # Display DCF
+        dcf_df = projection[['FCF', 'Discounted FCF']] / scale_factor
+        st.dataframe(
+            dcf_df.style.format("${:,.2f}"),
+            use_container_width=True
+        )
 
-            col1, col2 = st.columns(2)
-            with col1:
-                st.metric("Total FCF (Undiscounted)", f"${projection['FCF'].sum()/scale_factor:,.2f}{scale_name}")
-            with col2:
-                st.metric("Total PV of FCF", f"${total_pv_fcf/scale_factor:,.2f}{scale_name}")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Total FCF (Undiscounted)", _money(projection['FCF'].to_numpy().sum()))
+        with col2:
+            st.metric("Total PV of FCF", _money(total_pv_fcf))
 
-            # Visualize discounting effect
+        # Visualize discounting effect
+        if 'discounting' not in figs:
             fig, ax = plt.subplots(figsize=(12, 6))
 
-            x = np.arange(len(projection))
             width = 0.35
 
-            bars1 = ax.bar(x - width/2, projection['FCF']/scale_factor, width, label='FCF', alpha=0.8)
-            bars2 = ax.bar(x + width/2, projection['Discounted FCF']/scale_factor, width, label='Discounted FCF', alpha=0.8)
+            bars1 = ax.bar(years_idx - width/2, projection['FCF']/scale_factor, width, label='FCF', alpha=0.8)
+            bars2 = ax.bar(years_idx + width/2, projection['Discounted FCF']/scale_factor, width, label='Discounted FCF', alpha=0.8)
 
             ax.set_xlabel('Year')
             ax.set_ylabel(f'Amount (${scale_name})')
             ax.set_title('Free Cash Flow vs Discounted FCF')
-            ax.set_xticks(x)
-            ax.set_xticklabels([f"Y{i+1}" for i in x])
+            ax.set_xticks(years_idx, year_labels)
             ax.legend()
             ax.grid(True, alpha=0.3, axis='y')
 
-            st.pyplot(fig)
-
-            st.divider()
-
-            # SECTION 5: Terminal Value
-            st.header("5️⃣ Terminal Value")
-
-            final_fcf = projection['FCF'].iloc[-1]
-            terminal_value, pv_terminal = calculate_terminal_value(
-                final_fcf, wacc, terminal_growth, len(projection)
-            )
+            figs['discounting'] = fig
+            plt.close(fig)
+        st.pyplot(figs['discounting'])
 
-            st.markdown(f"""
-            **Terminal Value Calculation (Gordon Growth Model):**
+        st.divider()
 
-            Using final year FCF of **${final_fcf/scale_factor:,.2f}{scale_name}** and terminal growth rate of **{terminal_growth:.1%}**
-            """)
+        # SECTION 5: Terminal Value
+        st.header("5️⃣ Terminal Value")
 
-            st.latex(r"TV = \frac{FCF_{final} \times (1+g)}{WACC - g}")
+        st.markdown(f"""
+        **Terminal Value Calculation (Gordon Growth Model):**
 
-            col1, col2, col3 = st.columns(3)
+        Using final year FCF of **{_money(final_fcf)}** and terminal growth rate of **{terminal_growth:.1%}**
+        """)
 
-            with col1:
-                st.metric("Terminal Value", f"${terminal_value/scale_factor:,.2f}{scale_name}")
+        st.latex(r"TV = \frac{FCF_{final} \times (1+g)}{WACC - g}")
 
-            with col2:
-                st.metric("PV of Terminal Value", f"${pv_terminal/scale_factor:,.2f}{scale_name}")
+        col1, col2, col3 = st.columns(3)
 
-            with col3:
-                pct_of_value = pv_terminal / (total_pv_fcf + pv_terminal) * 100
-                st.metric("% of Total Value", f"{pct_of_value:.1f}%")
+        with col1:
+            st.metric("Terminal Value", _money(terminal_value))
 
-            st.divider()
+        with col2:
+            st.metric("PV of Terminal Value", _money(pv_terminal))
 
-            # SECTION 6: Valuation
-            st.header("6️⃣ Firm Valuation & Share Price")
+        with col3:
+            pct_of_value = pv_terminal / (total_pv_fcf + pv_terminal) * 100
+            st.metric("% of Total Value", f"{pct_of_value:.1f}%")
 
-            firm_value, equity_value, share_price = calculate_share_price(
-                total_pv_fcf, pv_terminal, total_debt, total_cash, shares_outstanding
-            )
+        st.divider()
 
-            # Display valuation waterfall
-            col1, col2, col3, col4 = st.columns(4)
+        # SECTION 6: Valuation
+        st.header("6️⃣ Firm Valuation & Share Price")
 
-            with col1:
-                st.metric("PV of FCF", f"${total_pv_fcf/scale_factor:,.2f}{scale_name}")
+        # Display valuation waterfall
+        col1, col2, col3, col4 = st.columns(4)
 
-            with col2:
-                st.metric("PV of Terminal Value", f"${pv_terminal/scale_factor:,.2f}{scale_name}")
+        with col1:
+            st.metric("PV of FCF", _money(total_pv_fcf))
 
-            with col3:
-                st.metric("Enterprise Value", f"${firm_value/scale_factor:,.2f}{scale_name}")
+        with col2:
+            st.metric("PV of Terminal Value", _money(pv_terminal))
 
-            with col4:
-                st.metric("Equity Value", f"${equity_value/scale_factor:,.2f}{scale_name}")
+        with col3:
+            st.metric("Enterprise Value", _money(firm_value))
 
-            # Share price with current comparison
-            current_price = info.get('currentPrice', info.get('regularMarketPrice', 0))
+        with col4:
+            st.metric("Equity Value", _money(equity_value))
 
-            st.subheader("💎 Implied Share Price")
+        # Share price with current comparison
+        st.subheader("💎 Implied Share Price")
 
-            col1, col2, col3 = st.columns(3)
+        col1, col2, col3 = st.columns(3)
 
-            with col1:
-                st.metric("DCF Implied Price", f"${share_price:,.2f}")
+        with col1:
+            st.metric("DCF Implied Price", f"${share_price:,.2f}")
 
-            with col2:
-                st.metric("Current Market Price", f"${current_price:,.2f}")
+        with col2:
+            st.metric("Current Market Price", f"${current_price:,.2f}")
 
-            with col3:
-                if current_price > 0:
-                    upside = (share_price - current_price) / current_price * 100
-                    st.metric("Implied Upside/Downside", f"{upside:+.1f}%")
-                else:
-                    st.metric("Implied Upside/Downside", "N/A")
+        with col3:
+            if current_price > 0:
+                upside = (share_price - current_price) / current_price * 100
+                st.metric("Implied Upside/Downside", f"{upside:+.1f}%")
+            else:
+                st.metric("Implied Upside/Downside", "N/A")
 
-            # Valuation waterfall chart
+        # Valuation waterfall chart
+        if 'waterfall' not in figs:
             fig, ax = plt.subplots(figsize=(10, 6))
 
-            waterfall_items = ['PV of FCF', 'PV of TV', 'Enterprise Value', '- Net Debt', 'Equity Value']
             waterfall_values = [
                 total_pv_fcf/scale_factor,
                 pv_terminal/scale_factor,
@@ -470,8 +624,7 @@ if calculate_button:
                 equity_value/scale_factor
             ]
 
-            colors = ['#2E86AB', '#A23B72', '#4ECDC4', '#FF6B6B', '#06D6A0']
-            bars = ax.bar(waterfall_items, waterfall_values, color=colors, alpha=0.7)
+            bars = ax.bar(_WATERFALL_ITEMS, waterfall_values, color=_WATERFALL_COLORS, alpha=0.7)
 
             ax.set_ylabel(f'Value (${scale_name})')
             ax.set_title(f'{ticker_symbol} Valuation Waterfall')
@@ -486,64 +639,37 @@ if calculate_button:
                        ha='center', va='bottom' if height > 0 else 'top')
 
             plt.tight_layout()
-            st.pyplot(fig)
-
-            st.divider()
-
-            # SECTION 7: Sensitivity Analysis
-            st.header("7️⃣ Sensitivity Analysis")
-
-            st.info("📊 Calculating share price range using WACC confidence intervals")
-
-            # Calculate with three WACC values
-            wacc_values = [wacc_lower, wacc, wacc_upper]
-            wacc_labels = ['Lower CI', 'Estimate', 'Upper CI']
-            share_prices = []
-
-            for current_wacc in wacc_values:
-                # Discount FCF
-                current_projection = projection.copy()
-                periods = np.arange(1, len(current_projection) + 1)
-                current_projection['Discounted FCF'] = current_projection['FCF'] / (1 + current_wacc) ** periods
+            figs['waterfall'] = fig
+            plt.close(fig)
+        st.pyplot(figs['waterfall'])
 
-                # Calculate TV
-                _, current_pv_terminal = calculate_terminal_value(
-                    final_fcf, current_wacc, terminal_growth, len(current_projection)
-                )
+        st.divider()
 
-                # Calculate share price
-                _, _, current_share_price = calculate_share_price(
-                    current_projection['Discounted FCF'].sum(),
-                    current_pv_terminal,
-                    total_debt,
-                    total_cash,
-                    shares_outstanding
-                )
+        # SECTION 7: Sensitivity Analysis
+        st.header("7️⃣ Sensitivity Analysis")
 
-                share_prices.append(current_share_price)
+        st.info("📊 Calculating share price range using WACC confidence intervals")
 
-            # Display price range
-            col1, col2, col3 = st.columns(3)
+        # Display price range
+        col1, col2, col3 = st.columns(3)
 
-            with col1:
-                st.metric(f"Price @ WACC {wacc_lower:.2%}", f"${share_prices[0]:,.2f}")
-                st.caption("Best case scenario")
+        with col1:
+            st.metric(f"Price @ WACC {wacc_lower:.2%}", f"${share_prices[0]:,.2f}")
+            st.caption("Best case scenario")
 
-            with col2:
-                st.metric(f"Price @ WACC {wacc:.2%}", f"${share_prices[1]:,.2f}")
-                st.caption("Base case estimate")
+        with col2:
+            st.metric(f"Price @ WACC {wacc:.2%}", f"${share_prices[1]:,.2f}")
+            st.caption("Base case estimate")
 
-            with col3:
-                st.metric(f"Price @ WACC {wacc_upper:.2%}", f"${share_prices[2]:,.2f}")
-                st.caption("Conservative scenario")
+        with col3:
+            st.metric(f"Price @ WACC {wacc_upper:.2%}", f"${share_prices[2]:,.2f}")
+            st.caption("Conservative scenario")
 
-            # Price range visualization with historical
-            st.subheader("📈 DCF Valuation vs Historical Price")
+        # Price range visualization with historical
+        st.subheader("📈 DCF Valuation vs Historical Price")
 
-            with st.spinner("Fetching historical price data..."):
-                historical_data = yf.download(ticker_symbol, period="1y", progress=False)
-
-            if not historical_data.empty:
+        if not historical_data.empty:
+            if 'history' not in figs:
                 fig, ax = plt.subplots(figsize=(14, 7))
 
                 # Plot historical price
@@ -569,76 +695,82 @@ if calculate_button:
                 ax.grid(True, alpha=0.3)
 
                 plt.tight_layout()
-                st.pyplot(fig)
-
-            # Summary table
-            st.subheader("📊 Valuation Summary")
-
-            summary_df = pd.DataFrame({
-                'Metric': [
-                    'LTM Revenue',
-                    'Projection Period',
-                    'Terminal Growth Rate',
-                    'WACC (Base)',
-                    'Enterprise Value',
-                    'Equity Value',
-                    'Shares Outstanding',
-                    'DCF Price (Low)',
-                    'DCF Price (Base)',
-                    'DCF Price (High)',
-                    'Current Market Price',
-                    'Implied Upside/Downside'
-                ],
-                'Value': [
-                    f"${ltm_revenue/scale_factor:,.2f}{scale_name}",
-                    f"{num_years} years",
-                    f"{terminal_growth:.1%}",
-                    f"{wacc:.2%}",
-                    f"${firm_value/scale_factor:,.2f}{scale_name}",
-                    f"${equity_value/scale_factor:,.2f}{scale_name}",
-                    f"{shares_outstanding/1000000:,.2f}M",
-                    f"${share_prices[2]:,.2f}",
-                    f"${share_prices[1]:,.2f}",
-                    f"${share_prices[0]:,.2f}",
-                    f"${current_price:,.2f}",
-                    f"{upside:+.1f}%" if current_price > 0 else "N/A"
-                ]
-            })
-
-            st.dataframe(summary_df, use_container_width=True, hide_index=True)
-
-            # Key insights
-            with st.expander("📌 View Key Insights"):
-                st.markdown(f"""
-                ### Valuation Insights for {company_name}
-
-                **Business Growth:**
-                - Starting from LTM revenue of ${ltm_revenue/scale_factor:,.2f}{scale_name}
-                - Projected to grow to ${projection['Revenue'].iloc[-1]/scale_factor:,.2f}{scale_name} in Year {num_years}
-                - Average revenue growth: {np.mean(growth_pattern):.1%}
+                figs['history'] = fig
+                plt.close(fig)
+            st.pyplot(figs['history'])
+
+        # Summary table
+        st.subheader("📊 Valuation Summary")
+
+        summary_df = pd.DataFrame({
+            'Metric': [
+                'LTM Revenue',
+                'Projection Period',
+                'Terminal Growth Rate',
+                'WACC (Base)',
+                'Enterprise Value',
+                'Equity Value',
+                'Shares Outstanding',
+                'DCF Price (Low)',
+                'DCF Price (Base)',
+                'DCF Price (High)',
+                'Current Market Price',
+                'Implied Upside/Downside'
+            ],
+            'Value': [
+                _money(ltm_revenue),
+                f"{num_years} years",
+                f"{terminal_growth:.1%}",
+                f"{wacc:.2%}",
+                _money(firm_value),
+                _money(equity_value),
+                f"{shares_outstanding/1000000:,.2f}M",
+                f"${share_prices[2]:,.2f}",
+                f"${share_prices[1]:,.2f}",
+                f"${share_prices[0]:,.2f}",
+                f"${current_price:,.2f}",
+                f"{upside:+.1f}%" if current_price > 0 else "N/A"
+            ]
+        })
 
-                **Profitability:**
-                - Average EBIT margin: {np.mean(ebit_margin_pattern):.1%}
-                - Average reinvestment rate: {np.mean(reinv_rate_pattern):.1%}
-                - Tax rate: {tax_rate:.1%}
+        st.dataframe(summary_df, use_container_width=True, hide_index=True)
 
-                **Value Breakdown:**
-                - {total_pv_fcf/(total_pv_fcf+pv_terminal)*100:.1f}% from projected cash flows
-                - {pv_terminal/(total_pv_fcf+pv_terminal)*100:.1f}% from terminal value
+        # Key insights
+        with st.expander("📌 View Key Insights"):
+            st.markdown(f"""
+            ### Valuation Insights for {company_name}
+
+            **Business Growth:**
+            - Starting from LTM revenue of {_money(ltm_revenue)}
+            - Projected to grow to {_money(projection['Revenue'].to_numpy()[-1])} in Year {num_years}
+            - Average revenue growth: {growth_arr.mean():.1%}
+
+            **Profitability:**
+            - Average EBIT margin: {ebit_arr.mean():.1%}
+            - Average reinvestment rate: {reinv_arr.mean():.1%}
+            - Tax rate: {tax_rate:.1%}
+
+            **Value Breakdown:**
+            - {total_pv_fcf/(total_pv_fcf+pv_terminal)*100:.1f}% from projected cash flows
+            - {pv_terminal/(total_pv_fcf+pv_terminal)*100:.1f}% from terminal value
+
+            **Investment Thesis:**
+            - DCF base case suggests {'undervaluation' if upside > 0 else 'overvaluation'} of {abs(upside):.1f}%
+            - Price range: ${share_prices[2]:,.2f} to ${share_prices[0]:,.2f}
+            - Current price: ${current_price:,.2f}
+            """)
 
-                **Investment Thesis:**
-                - DCF base case suggests {'undervaluation' if upside > 0 else 'overvaluation'} of {abs(upside):.1f}%
-                - Price range: ${share_prices[2]:,.2f} to ${share_prices[0]:,.2f}
-                - Current price: ${current_price:,.2f}
-                """)
+    except Exception as e:
+        st.error(f"Error in calculations: {str(e)}")
+        st.exception(e)
+    finally:
+        # A figure left half-built by an error would otherwise stay in pyplot's registry
+        plt.close('all')
 
-        except Exception as e:
-            st.error(f"Error in calculations: {str(e)}")
-            st.exception(e)
-    else:
-        st.error("Unable to fetch data. Please check the ticker symbol and try again.")
+elif stored_results is not None:
+    st.info("👈 Assumptions have changed since the last valuation. Click 'Calculate Valuation' to update.")
 
-else:
+elif not calculate_button:
     st.info("👈 Configure your DCF model parameters in the sidebar and click 'Calculate Valuation' to begin.")
 
     # Instructions
@@ -647,9 +779,9 @@ else:
 
     1. **Enter Ticker Symbol**: Input the company you want to value
     2. **Set Projection Period**: Choose how many years to project (5-15 years)
-    3. **Choose Projection Mode**:
-       - **Simple**: Enter initial and final growth rates (linear interpolation)
-       - **Advanced**: Specify exact values for each year
+    3. **Choose Interpolation Method**:
+       - **Linear**: Equal steps from the Year 1 value to the final-year value
+       - **Exponential**: Constant-ratio decay between the two values
     4. **Configure Assumptions**:
        - Revenue growth rates
        - EBIT margins